@@ -0,0 +1,97 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2021 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Regression benchmark for rewriting long generic signatures in parsedoc.
+
+Each signature has one argument per qualified class name, so the old implementation (one
+str.replace() over the whole declaration per class name) scales quadratically with the signature
+length.  The benchmark also checks that rewriting "pkg.A" does not corrupt "mypkg.A".
+"""
+
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import click
+
+from pybind11_generics.stubgen.parsedoc import parse_declaration
+
+
+def make_signature(num_args: int) -> str:
+    args = ", ".join(
+        f"a{idx}: Dict[str, List[Tuple[int, pkg.mod{idx % 7}.Cls{idx}]]]" for idx in range(num_args)
+    )
+    return f"def f({args}, x: pkg.A = 1, y: mypkg.A = 2) -> Optional[pkg.mod0.Cls0]: ..."
+
+
+def expected_signature(num_args: int) -> str:
+    args = ", ".join(f"a{idx}: Dict[str, List[Tuple[int, Cls{idx}]]]" for idx in range(num_args))
+    return f"def f({args}, x: A = 1, y: A = 2) -> Optional[Cls0]: ..."
+
+
+def time_call(fun: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fun()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@click.command(context_settings={"help_option_names": ["-h", "--help"]})
+@click.option(
+    "-s",
+    "--sizes",
+    default="10,100,1000,4000",
+    show_default=True,
+    help="Comma separated number of arguments in each signature.",
+)
+@click.option("-r", "--repeat", default=5, show_default=True, help="Number of timing repeats.")
+@click.option("-o", "--output", default="", help="Write JSON results to this file.")
+def run_benchmark(sizes: str, repeat: int, output: str) -> None:
+    """Time rewriting of long generic signatures with many qualified class names."""
+    # bypass the declaration cache, we want to time the parsing itself
+    parse_fun = parse_declaration.__wrapped__  # type: ignore[attr-defined]
+
+    results: List[Dict[str, Any]] = []
+    ok = True
+    for num_args in (int(val) for val in sizes.split(",")):
+        declaration = make_signature(num_args)
+        result = parse_fun(declaration)
+        correct = result is not None and result[0] == expected_signature(num_args)
+        ok = ok and correct
+        elapsed = time_call(lambda: parse_fun(declaration), repeat)
+        results.append(
+            dict(num_args=num_args, length=len(declaration), seconds=elapsed, correct=correct)
+        )
+        print(
+            f"{num_args:>6d} args, {len(declaration):>8d} chars: {elapsed:.6f} s", file=sys.stderr
+        )
+
+    content = json.dumps(dict(benchmark="parsedoc_signatures", results=results), indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(content)
+            f.write("\n")
+    else:
+        print(content)
+
+    if not ok:
+        raise SystemExit("Rewritten signatures do not match expected output.")
+
+
+if __name__ == "__main__":
+    run_benchmark()
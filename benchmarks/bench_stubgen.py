@@ -0,0 +1,205 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2021 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark stub generation throughput over synthetic pybind11-like modules.
+
+The synthetic modules are built from plain Python objects that stubgen treats the same way as
+pybind11 objects: module objects without __file__, classes whose methods are method descriptors
+with pybind11 style docstrings (including "Overloaded function." docstrings), properties with
+generic type docstrings, and nested submodules.  No compiler is needed.
+
+NOTE: module level functions are not generated, since stubgen only accepts builtin functions
+there and those cannot be created from Python.  Static methods exercise the same code path.
+"""
+
+import json
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import click
+
+from pybind11_generics.stubgen.__main__ import walk_packages
+from pybind11_generics.stubgen.parsedoc import parse_declaration
+from pybind11_generics.stubgen.stubgenc import generate_stub_for_c_module, get_stub_content
+
+# generic types used in synthetic signatures
+type_pool = (
+    "int",
+    "float",
+    "str",
+    "List[int]",
+    "Dict[str, List[Tuple[int, float]]]",
+    "Optional[pkg.core.Node]",
+    "Dict[str, Union[int, float, str, List[pkg.core.Node]]]",
+    "Sequence[Tuple[str, pkg.core.Handle]]",
+)
+
+
+class MethodDescriptor:
+    """A method descriptor with a pybind11 style docstring."""
+
+    def __init__(self, doc: str) -> None:
+        self.__doc__ = doc
+
+    def __get__(self, obj: Any, objtype: Any = None) -> "MethodDescriptor":
+        return self
+
+
+def make_signature(name: str, self_var: Optional[str], idx: int) -> str:
+    arg0 = type_pool[idx % len(type_pool)]
+    arg1 = type_pool[(idx + 3) % len(type_pool)]
+    ret = type_pool[(idx + 5) % len(type_pool)]
+    self_arg = f"{self_var}, " if self_var else ""
+    return f"{name}({self_arg}a: {arg0}, b: {arg1} = 0) -> {ret}"
+
+
+def make_method_doc(name: str, self_var: Optional[str], idx: int, num_overloads: int) -> str:
+    if num_overloads < 2:
+        return make_signature(name, self_var, idx) + "\n\nA synthetic method.\n"
+
+    lines = [f"{name}(*args, **kwargs)", "Overloaded function.", ""]
+    for cnt in range(num_overloads):
+        lines.append(f"{cnt + 1}. {make_signature(name, self_var, idx + cnt)}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def make_class(module_name: str, cls_name: str, num_methods: int, num_overloads: int) -> type:
+    ns: Dict[str, Any] = {
+        "__init__": MethodDescriptor(f"__init__(self, a: {type_pool[4]}) -> None"),
+        "__hash__": MethodDescriptor("__hash__(self) -> int"),
+        "create": staticmethod(
+            MethodDescriptor(make_signature("create", None, 1))  # type: ignore[arg-type]
+        ),
+    }
+    for idx in range(num_methods):
+        name = f"method_{idx}"
+        # every other method is overloaded
+        overloads = num_overloads if idx % 2 else 1
+        ns[name] = MethodDescriptor(make_method_doc(name, "self", idx, overloads))
+    for idx in range(max(num_methods // 4, 1)):
+        prop_type = type_pool[idx % len(type_pool)]
+        if idx % 2:
+            ns[f"prop_{idx}"] = property(lambda self: None, doc=f"{prop_type}: a property.")
+        else:
+            ns[f"prop_{idx}"] = property(
+                lambda self: None, lambda self, val: None, doc=f"{prop_type}: a property."
+            )
+
+    cls = type(cls_name, (object,), ns)
+    cls.__module__ = module_name
+    return cls
+
+
+def make_module(
+    name: str, num_classes: int, num_methods: int, num_overloads: int, num_submodules: int
+) -> types.ModuleType:
+    """Create a synthetic module and register it (and its submodules) in sys.modules."""
+    module = types.ModuleType(name, "A synthetic pybind11 module.")
+    for idx in range(num_classes):
+        cls_name = f"Class{idx}"
+        setattr(module, cls_name, make_class(name, cls_name, num_methods, num_overloads))
+    module.VERSION = 1  # type: ignore[attr-defined]
+    sys.modules[name] = module
+
+    for idx in range(num_submodules):
+        sub_name = f"sub{idx}"
+        submodule = make_module(
+            f"{name}.{sub_name}", max(num_classes // 4, 1), num_methods, num_overloads, 0
+        )
+        setattr(module, sub_name, submodule)
+    return module
+
+
+def time_call(fun: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        # start from a cold declaration cache each time
+        parse_declaration.cache_clear()
+        start = time.perf_counter()
+        fun()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@click.command(context_settings={"help_option_names": ["-h", "--help"]})
+@click.option(
+    "-s",
+    "--sizes",
+    default="5,20,50",
+    show_default=True,
+    help="Comma separated number of classes in each synthetic module.",
+)
+@click.option("-m", "--methods", default=20, show_default=True, help="Methods per class.")
+@click.option("--overloads", default=3, show_default=True, help="Overloads per overloaded method.")
+@click.option("--submodules", default=4, show_default=True, help="Submodules per module.")
+@click.option("-r", "--repeat", default=3, show_default=True, help="Number of timing repeats.")
+@click.option("-o", "--output", default="", help="Write JSON results to this file.")
+def run_benchmark(
+    sizes: str, methods: int, overloads: int, submodules: int, repeat: int, output: str
+) -> None:
+    """Time stub generation over synthetic modules of increasing size."""
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = Path(tmp_dir)
+        for num_classes in (int(val) for val in sizes.split(",")):
+            name = f"_bench_stubgen_{num_classes}"
+            module = make_module(name, num_classes, methods, overloads, submodules)
+            module_list = list(walk_packages([name]))
+
+            walk_time = time_call(lambda: list(walk_packages([name])), repeat)
+            content_time = time_call(lambda: get_stub_content(module), repeat)
+            generate_time = time_call(lambda: generate_stub_for_c_module(name, output_path), repeat)
+            all_time = time_call(
+                lambda: [generate_stub_for_c_module(val, output_path) for val in module_list],
+                repeat,
+            )
+            num_members = methods * num_classes
+            results.append(
+                dict(
+                    classes=num_classes,
+                    methods_per_class=methods,
+                    modules=len(module_list),
+                    stub_bytes=len(get_stub_content(module)),
+                    walk_packages_seconds=walk_time,
+                    stub_content_seconds=content_time,
+                    generate_stub_seconds=generate_time,
+                    generate_all_seconds=all_time,
+                    methods_per_second=num_members / generate_time,
+                )
+            )
+            print(
+                f"{num_classes:>6d} classes: content {content_time:.4f} s, "
+                f"stub {generate_time:.4f} s, all {len(module_list)} modules {all_time:.4f} s",
+                file=sys.stderr,
+            )
+
+    content = json.dumps(
+        dict(benchmark="stubgen", python=sys.version.split()[0], results=results), indent=2
+    )
+    if output:
+        with open(output, "w") as f:
+            f.write(content)
+            f.write("\n")
+    else:
+        print(content)
+
+
+if __name__ == "__main__":
+    run_benchmark()
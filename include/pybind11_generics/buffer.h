@@ -0,0 +1,158 @@
+/*
+   Copyright 2018 Eric Chang
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+*/
+
+#ifndef PYBIND11_GENERICS_BUFFER_H
+#define PYBIND11_GENERICS_BUFFER_H
+
+#include <cstddef>
+#include <memory>
+#include <optional>
+#include <type_traits>
+
+#include <pybind11/pybind11.h>
+
+namespace py = pybind11;
+
+namespace pybind11_generics {
+
+namespace detail {
+
+struct buffer_release {
+    void operator()(Py_buffer *view) const {
+        PyBuffer_Release(view);
+        delete view;
+    }
+};
+
+// returns the kind of numbers of a struct module format character
+inline char get_format_kind(char code) {
+    switch (code) {
+    case 'b':
+    case 'h':
+    case 'i':
+    case 'l':
+    case 'q':
+    case 'n':
+        return 'i';
+    case 'B':
+    case 'H':
+    case 'I':
+    case 'L':
+    case 'Q':
+    case 'N':
+        return 'u';
+    case 'e':
+    case 'f':
+    case 'd':
+        return 'f';
+    case '?':
+        return '?';
+    default:
+        return '\0';
+    }
+}
+
+template <typename T> constexpr char get_type_kind() {
+    if constexpr (std::is_same_v<T, bool>)
+        return '?';
+    else if constexpr (std::is_floating_point_v<T>)
+        return 'f';
+    else if constexpr (std::is_signed_v<T>)
+        return 'i';
+    else
+        return 'u';
+}
+
+// returns true if the buffer is a 1D contiguous array of T in native byte order.
+// Only the kind of numbers and the item size are compared, so for example 'l' and 'q'
+// both match a 64-bit integer.
+template <typename T> bool is_buffer_compatible(const Py_buffer &view) {
+    if (view.ndim != 1 || view.itemsize != static_cast<Py_ssize_t>(sizeof(T)) ||
+        (view.strides && view.strides[0] != view.itemsize)) {
+        return false;
+    }
+    // NULL format means unsigned bytes
+    const char *fmt = view.format ? view.format : "B";
+    switch (fmt[0]) {
+    case '@':
+    case '=':
+        ++fmt;
+        break;
+    case '<':
+        if (!PY_LITTLE_ENDIAN)
+            return false;
+        ++fmt;
+        break;
+    case '>':
+    case '!':
+        if (PY_LITTLE_ENDIAN)
+            return false;
+        ++fmt;
+        break;
+    default:
+        break;
+    }
+    return fmt[0] != '\0' && fmt[1] == '\0' && get_format_kind(fmt[0]) == get_type_kind<T>();
+}
+
+} // namespace detail
+
+// A read-only view of the memory of a Python object that supports the buffer protocol,
+// such as array.array, bytes, memoryview or a 1D numpy array.  The buffer is kept alive
+// (and cannot be resized) for the lifetime of the view.
+template <typename T> class buffer_span {
+  public:
+    using value_type = T;
+    using const_iterator = const value_type *;
+    using const_reference = const value_type &;
+
+  private:
+    std::unique_ptr<Py_buffer, detail::buffer_release> view_;
+
+    explicit buffer_span(Py_buffer *view) : view_(view) {}
+
+  public:
+    // returns the buffer of obj if it holds contiguous values of type T, without copying.
+    static std::optional<buffer_span> from_object(py::handle obj) {
+        static_assert(std::is_arithmetic_v<T>, "buffer_span only supports numeric types.");
+        if (!PyObject_CheckBuffer(obj.ptr())) {
+            return {};
+        }
+        auto view = new Py_buffer();
+        if (PyObject_GetBuffer(obj.ptr(), view, PyBUF_RECORDS_RO) != 0) {
+            delete view;
+            PyErr_Clear();
+            return {};
+        }
+        auto ans = buffer_span(view);
+        if (!detail::is_buffer_compatible<T>(*view)) {
+            return {};
+        }
+        return ans;
+    }
+
+    const value_type *data() const { return static_cast<const value_type *>(view_->buf); }
+    std::size_t size() const { return static_cast<std::size_t>(view_->shape[0]); }
+    bool empty() const { return size() == 0; }
+
+    const_iterator begin() const { return data(); }
+    const_iterator end() const { return data() + size(); }
+    const_reference operator[](std::size_t index) const { return data()[index]; }
+};
+
+} // namespace pybind11_generics
+
+#endif
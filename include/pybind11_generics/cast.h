@@ -46,15 +46,17 @@ T cast_from_handle(const H &val) {
 // to avoid redundant reference creation
 template <typename T, typename H, std::enable_if_t<std::is_same_v<py::handle, H>> * = nullptr>
 T cast_from_handle_steal(const H &val) {
+    // take ownership first, so the reference is released when the conversion is done or fails
+    auto obj = pybind11::reinterpret_steal<py::object>(val);
     if constexpr (std::is_same_v<T, py::object>) {
-        return pybind11::reinterpret_steal<T>(val);
+        return obj;
     } else if constexpr (pybind11::detail::is_pyobject<T>::value) {
-        if (pybind11::isinstance<T>(val)) {
-            return pybind11::reinterpret_steal<T>(val);
+        if (pybind11::isinstance<T>(obj)) {
+            return pybind11::reinterpret_steal<T>(obj.release());
         }
         throw py::type_error("Cannot cast item to generic type!");
     } else {
-        return val.template cast<T>();
+        return obj.template cast<T>();
     }
 }
 
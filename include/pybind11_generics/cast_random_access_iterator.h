@@ -0,0 +1,156 @@
+/*
+   Copyright 2018 Eric Chang
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+*/
+
+#ifndef PYBIND11_GENERICS_CAST_RANDOM_ACCESS_ITERATOR_H
+#define PYBIND11_GENERICS_CAST_RANDOM_ACCESS_ITERATOR_H
+
+#include <iterator>
+#include <utility>
+
+#include <pybind11/pybind11.h>
+
+#include <pybind11_generics/cast.h>
+
+namespace py = pybind11;
+
+namespace pybind11_generics {
+
+namespace detail {
+
+// item access policies of cast_random_access_iterator
+struct list_item_policy {
+    template <typename T> static T get(PyObject *obj, Py_ssize_t idx) {
+        PyObject *result = PyList_GetItem(obj, idx);
+        if (!result) {
+            throw py::error_already_set();
+        }
+        return cast_from_handle<T>(py::handle(result));
+    }
+};
+
+struct tuple_item_policy {
+    template <typename T> static T get(PyObject *obj, Py_ssize_t idx) {
+        PyObject *result = PyTuple_GetItem(obj, idx);
+        if (!result) {
+            throw py::error_already_set();
+        }
+        return cast_from_handle<T>(py::handle(result));
+    }
+};
+
+struct sequence_item_policy {
+    template <typename T> static T get(PyObject *obj, Py_ssize_t idx) {
+        // fast path: exact lists and tuples return borrowed references from their item arrays.
+        // Subclasses may override __getitem__, so they go through the generic path.
+        if (PyList_CheckExact(obj)) {
+            return list_item_policy::get<T>(obj, idx);
+        }
+        if (PyTuple_CheckExact(obj)) {
+            return tuple_item_policy::get<T>(obj, idx);
+        }
+        PyObject *result = PySequence_GetItem(obj, idx);
+        if (!result) {
+            throw py::error_already_set();
+        }
+        // NOTE: PySequence_GetItem() returns a new reference instead of a borrowed reference,
+        // so we need to steal the reference.
+        return cast_from_handle_steal<T>(py::handle(result));
+    }
+};
+
+} // namespace detail
+
+// A random access iterator over a Python sequence that converts items on dereference.
+// Moving the iterator never converts or copies items, so std::distance(), std::advance()
+// and binary searches only convert the items they look at.
+// NOTE: the iterator does not own a reference to the sequence, like pybind11 iterators.
+template <typename T, typename Policy> class cast_random_access_iterator {
+  public:
+    using difference_type = Py_ssize_t;
+    using iterator_category = std::random_access_iterator_tag;
+    using value_type = T;
+    // items are converted on dereference, so return by value
+    using reference = value_type;
+    using It = cast_random_access_iterator;
+
+    // holds the converted item for operator->()
+    class pointer {
+      private:
+        value_type val_;
+
+      public:
+        explicit pointer(value_type val) : val_(std::move(val)) {}
+        const value_type *operator->() const { return &val_; }
+    };
+
+  protected:
+    py::handle obj_;
+    difference_type idx_ = 0;
+
+  public:
+    cast_random_access_iterator() = default;
+
+    cast_random_access_iterator(py::handle obj, difference_type idx) : obj_(obj), idx_(idx) {}
+
+    reference operator*() const { return Policy::template get<value_type>(obj_.ptr(), idx_); }
+    pointer operator->() const { return pointer(**this); }
+    reference operator[](difference_type n) const {
+        return Policy::template get<value_type>(obj_.ptr(), idx_ + n);
+    }
+
+    It &operator++() {
+        ++idx_;
+        return *this;
+    }
+    It operator++(int) {
+        auto copy = *this;
+        ++idx_;
+        return copy;
+    }
+    It &operator--() {
+        --idx_;
+        return *this;
+    }
+    It operator--(int) {
+        auto copy = *this;
+        --idx_;
+        return copy;
+    }
+    It &operator+=(difference_type n) {
+        idx_ += n;
+        return *this;
+    }
+    It &operator-=(difference_type n) {
+        idx_ -= n;
+        return *this;
+    }
+
+    friend It operator+(It a, difference_type n) { return a += n; }
+    friend It operator+(difference_type n, It a) { return a += n; }
+    friend It operator-(It a, difference_type n) { return a -= n; }
+    friend difference_type operator-(const It &a, const It &b) { return a.idx_ - b.idx_; }
+
+    friend bool operator==(const It &a, const It &b) { return a.idx_ == b.idx_; }
+    friend bool operator!=(const It &a, const It &b) { return a.idx_ != b.idx_; }
+    friend bool operator<(const It &a, const It &b) { return a.idx_ < b.idx_; }
+    friend bool operator>(const It &a, const It &b) { return a.idx_ > b.idx_; }
+    friend bool operator<=(const It &a, const It &b) { return a.idx_ <= b.idx_; }
+    friend bool operator>=(const It &a, const It &b) { return a.idx_ >= b.idx_; }
+};
+
+} // namespace pybind11_generics
+
+#endif
@@ -17,6 +17,8 @@
 #ifndef PYBIND11_GENERICS_DICT_H
 #define PYBIND11_GENERICS_DICT_H
 
+#include <map>
+#include <unordered_map>
 #include <utility>
 
 #include <pybind11_generics/cast_input_iterator.h>
@@ -75,6 +77,112 @@ template <typename K, typename V, typename WrapIter> class dict_cast_input_itera
     }
 };
 
+namespace detail {
+
+// NOTE: the known hash functions are private, and are not available in newer Python versions.
+#if PY_VERSION_HEX < 0x030D0000
+#define PYBIND11_GENERICS_DICT_KNOWN_HASH
+#endif
+
+// returns a borrowed reference to the value of key in an exact dict, or nullptr if key is missing
+inline PyObject *dict_get_item(PyObject *dict, PyObject *key, Py_hash_t hash) {
+#ifdef PYBIND11_GENERICS_DICT_KNOWN_HASH
+    PyObject *result = _PyDict_GetItem_KnownHash(dict, key, hash);
+#else
+    PyObject *result = PyDict_GetItemWithError(dict, key);
+#endif
+    if (!result && PyErr_Occurred()) {
+        throw py::error_already_set();
+    }
+    return result;
+}
+
+inline void dict_set_item(PyObject *dict, PyObject *key, PyObject *val, Py_hash_t hash) {
+    int code;
+#ifdef PYBIND11_GENERICS_DICT_KNOWN_HASH
+    if (PyDict_CheckExact(dict)) {
+        code = _PyDict_SetItem_KnownHash(dict, key, val, hash);
+    } else {
+        code = PyObject_SetItem(dict, key, val);
+    }
+#else
+    code = PyObject_SetItem(dict, key, val);
+#endif
+    if (code != 0) {
+        throw py::error_already_set();
+    }
+}
+
+// wraps a dict iterator to only return the key (I = 0) or only the value (I = 1)
+template <std::size_t I> class dict_item_iterator {
+  public:
+    using It = dict_item_iterator;
+
+  private:
+    py::detail::dict_iterator iter_;
+
+  public:
+    dict_item_iterator() = default;
+
+    explicit dict_item_iterator(py::detail::dict_iterator iter) : iter_(std::move(iter)) {}
+
+    friend bool operator==(const It &a, const It &b) { return a.iter_ == b.iter_; }
+    friend bool operator!=(const It &a, const It &b) { return !(a == b); }
+
+    py::handle operator*() const { return std::get<I>(*iter_); }
+
+    It &operator++() {
+        ++iter_;
+        return *this;
+    }
+};
+
+} // namespace detail
+
+// A view of only the keys (I = 0) or only the values (I = 1) of a dictionary, which only
+// converts that side of each item.
+template <typename T, std::size_t I> class dict_view {
+  public:
+    using value_type = T;
+    using const_iterator = cast_input_iterator<T, detail::dict_item_iterator<I>>;
+
+  private:
+    py::dict dict_;
+
+  public:
+    explicit dict_view(py::dict dict) : dict_(std::move(dict)) {}
+
+    const_iterator begin() const {
+        return const_iterator(detail::dict_item_iterator<I>(dict_.begin()),
+                              detail::dict_item_iterator<I>(dict_.end()));
+    }
+    const_iterator end() const {
+        return const_iterator(detail::dict_item_iterator<I>(dict_.end()),
+                              detail::dict_item_iterator<I>(dict_.end()));
+    }
+    std::size_t size() const { return dict_.size(); }
+};
+
+// A dictionary key that is converted to a Python object and hashed once, so repeated lookups of
+// the same key in any Dict<K, V> do not allocate or hash again.
+template <typename K> class DictKey {
+  private:
+    py::object key_;
+    Py_hash_t hash_;
+
+  public:
+    explicit DictKey(const K &key)
+        : key_(py::detail::object_or_cast(key)), hash_(PyObject_Hash(key_.ptr())) {
+        if (hash_ == -1) {
+            throw py::error_already_set();
+        }
+    }
+
+    const py::object &key() const { return key_; }
+    PyObject *ptr() const { return key_.ptr(); }
+    Py_hash_t hash() const { return hash_; }
+};
+
 using dict_base = py::dict;
 
 template <typename K, typename V> class Dict : public dict_base {
@@ -97,6 +205,21 @@ template <typename K, typename V> class Dict : public dict_base {
         }
     }
 
+    template <class Map> void fill_map(Map &ans) const {
+        PyObject *key, *val;
+        Py_ssize_t pos = 0;
+        while (PyDict_Next(ptr(), &pos, &key, &val)) {
+            ans.emplace(cast_from_handle<K>(py::handle(key)), cast_from_handle<V>(py::handle(val)));
+        }
+    }
+
+    [[noreturn]] static void throw_key_error(const DictKey<K> &key) {
+        // wrap the key in a tuple, so tuple keys are not used as exception arguments
+        auto args = py::make_tuple(key.key());
+        PyErr_SetObject(PyExc_KeyError, args.ptr());
+        throw py::error_already_set();
+    }
+
   public:
     // inherit check_ so we can check if a python object matches this generic
     using dict_base::check_;
@@ -112,6 +235,24 @@ template <typename K, typename V> class Dict : public dict_base {
         if (!result) {
             throw py::error_already_set();
         }
+        // NOTE: PyObject_GetItem() returns a new reference instead of a borrowed reference,
+        // so we need to steal the reference.
+        return cast_from_handle_steal<V>(py::handle(result));
+    }
+
+    V operator[](const DictKey<K> &key) const {
+        // dict subclasses may override __getitem__() or __missing__()
+        if (!PyDict_CheckExact(ptr())) {
+            auto result = PyObject_GetItem(ptr(), key.ptr());
+            if (!result) {
+                throw py::error_already_set();
+            }
+            return cast_from_handle_steal<V>(py::handle(result));
+        }
+        auto result = detail::dict_get_item(ptr(), key.ptr(), key.hash());
+        if (!result) {
+            throw_key_error(key);
+        }
         return cast_from_handle<V>(py::handle(result));
     }
 
@@ -123,16 +264,50 @@ template <typename K, typename V> class Dict : public dict_base {
         insert_or_assign_helper(key_obj.ptr(), std::forward<M>(obj));
     }
 
+    template <class M> void insert_or_assign(const DictKey<K> &key, M &&obj) {
+        if constexpr (py::detail::is_pyobject<M>::value) {
+            detail::dict_set_item(ptr(), key.ptr(), obj.ptr(), key.hash());
+        } else {
+            auto val_obj = py::cast(V(std::forward<M>(obj)));
+            detail::dict_set_item(ptr(), key.ptr(), val_obj.ptr(), key.hash());
+        }
+    }
+
     const_iterator begin() const { return const_iterator(dict_base::begin(), dict_base::end()); }
 
     const_iterator end() const { return const_iterator(dict_base::end(), dict_base::end()); }
 
+    dict_view<K, 0> keys() const { return dict_view<K, 0>(*this); }
+
+    dict_view<V, 1> values() const { return dict_view<V, 1>(*this); }
+
+    // convert all items in a single pass over the dictionary
+    std::unordered_map<K, V> to_unordered_map() const {
+        std::unordered_map<K, V> ans;
+        ans.reserve(size());
+        fill_map(ans);
+        return ans;
+    }
+
+    std::map<K, V> to_map() const {
+        std::map<K, V> ans;
+        fill_map(ans);
+        return ans;
+    }
+
     template <class KeyType,
               std::enable_if_t<
                   std::is_same_v<K, std::remove_cv_t<std::remove_reference_t<KeyType>>>, int> = 0>
     bool contains(KeyType &&key) const {
         return dict_base::contains(py::detail::object_or_cast(std::forward<KeyType>(key)));
     }
+
+    bool contains(const DictKey<K> &key) const {
+        if (!PyDict_CheckExact(ptr())) {
+            return dict_base::contains(key.key());
+        }
+        return detail::dict_get_item(ptr(), key.ptr(), key.hash()) != nullptr;
+    }
 };
 
 } // namespace pybind11_generics
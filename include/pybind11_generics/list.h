@@ -17,9 +17,12 @@
 #ifndef PYBIND11_GENERICS_LIST_H
 #define PYBIND11_GENERICS_LIST_H
 
+#include <iterator>
 #include <type_traits>
+#include <utility>
+#include <vector>
 
-#include <pybind11_generics/cast_input_iterator.h>
+#include <pybind11_generics/cast_random_access_iterator.h>
 #include <pybind11_generics/type_name.h>
 
 namespace py = pybind11;
@@ -32,8 +35,7 @@ template <typename T> class List : public list_base {
   public:
     using value_type = std::remove_reference_t<T>;
     using const_reference = const value_type &;
-    using base_iter_type = py::detail::list_iterator;
-    using const_iterator = cast_input_iterator<value_type, base_iter_type>;
+    using const_iterator = cast_random_access_iterator<value_type, detail::list_item_policy>;
 
     template <typename V>
     using IsT =
@@ -44,6 +46,58 @@ template <typename T> class List : public list_base {
     using list_base::check_;
     using list_base::list_base;
 
+    // create a list of the exact size and fill it directly, without any resizing.
+    // Elements are moved into Python objects if the iterators are move iterators.
+    template <class Iter> static List from_range(Iter first, Iter last) {
+        using reference = typename std::iterator_traits<Iter>::reference;
+        // NOTE: the range is traversed twice, so single-pass iterators would be used up by
+        // std::distance() before any element is added.
+        static_assert(std::is_base_of_v<std::forward_iterator_tag,
+                                        typename std::iterator_traits<Iter>::iterator_category>,
+                      "List::from_range() requires forward iterators.");
+        static_assert(std::is_convertible_v<reference, value_type>,
+                      "List::from_range() elements must be convertible to the list value type.");
+
+        auto size = std::distance(first, last);
+        PyObject *result = PyList_New(static_cast<Py_ssize_t>(size));
+        if (!result) {
+            throw py::error_already_set();
+        }
+        // NOTE: steal the reference first, so the list is freed if a cast throws.
+        // Unset items are NULL, which list deallocation handles.
+        auto ans = py::reinterpret_steal<List>(result);
+        for (Py_ssize_t idx = 0; first != last; ++first, ++idx) {
+            // convert through value_type, so the list always holds the generic element type
+            if constexpr (std::is_same_v<std::remove_cv_t<std::remove_reference_t<reference>>,
+                                         value_type>) {
+                PyList_SET_ITEM(result, idx, py::cast(*first).release().ptr());
+            } else {
+                PyList_SET_ITEM(result, idx, py::cast(value_type(*first)).release().ptr());
+            }
+        }
+        return ans;
+    }
+
+    template <class Range> static List from_range(Range &&range) {
+        if constexpr (std::is_rvalue_reference_v<Range &&>) {
+            return from_range(std::make_move_iterator(std::begin(range)),
+                              std::make_move_iterator(std::end(range)));
+        } else {
+            return from_range(std::begin(range), std::end(range));
+        }
+    }
+
+    // convert all elements to a vector that is allocated once
+    std::vector<value_type> to_vector() const {
+        std::vector<value_type> ans;
+        ans.reserve(size());
+        // NOTE: casting may run Python code that changes the list size, so check every time
+        for (Py_ssize_t idx = 0; idx < PyList_GET_SIZE(ptr()); ++idx) {
+            ans.push_back(cast_from_handle<value_type>(py::handle(PyList_GET_ITEM(ptr(), idx))));
+        }
+        return ans;
+    }
+
     value_type operator[](size_t index) const {
         PyObject *result = PyList_GetItem(ptr(), static_cast<Py_ssize_t>(index));
         if (!result) {
@@ -51,8 +105,8 @@ template <typename T> class List : public list_base {
         }
         return cast_from_handle<value_type>(py::handle(result));
     }
-    const_iterator begin() const { return const_iterator(list_base::begin(), list_base::end()); }
-    const_iterator end() const { return const_iterator(list_base::end(), list_base::end()); }
+    const_iterator begin() const { return const_iterator(*this, 0); }
+    const_iterator end() const { return const_iterator(*this, PyList_GET_SIZE(ptr())); }
 
     template <class V, IsT<V> = 0> void append(V &&val) const {
         list_base::append(std::forward<V>(val));
@@ -63,7 +117,8 @@ template <typename T> class List : public list_base {
     template <class... Args> void emplace_back(Args &&...args) {
         push_back(value_type(std::forward<Args>(args)...));
     }
-    // empty method for compatibility reason
+    // empty method for compatibility reason.  Python lists cannot be reserved, since CPython
+    // shrinks over-allocated lists on append; use from_range() to build lists of known size.
     void reserve(std::size_t size) {}
 };
 
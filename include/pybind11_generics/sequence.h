@@ -17,9 +17,12 @@
 #ifndef PYBIND11_GENERICS_SEQUENCE_H
 #define PYBIND11_GENERICS_SEQUENCE_H
 
+#include <optional>
 #include <type_traits>
+#include <vector>
 
-#include <pybind11_generics/cast_input_iterator.h>
+#include <pybind11_generics/buffer.h>
+#include <pybind11_generics/cast_random_access_iterator.h>
 #include <pybind11_generics/type_name.h>
 
 namespace py = pybind11;
@@ -29,53 +32,9 @@ namespace pybind11_generics {
 using sequence_base = py::sequence;
 
 template <typename T> class Sequence : public sequence_base {
-  private:
-    class cast_seq_iterator {
-      public:
-        using difference_type = std::size_t;
-        using iterator_category = std::input_iterator_tag;
-        using value_type = std::remove_reference_t<T>;
-        using reference = const value_type &;
-        using pointer = const value_type *;
-        using It = cast_seq_iterator;
-
-      protected:
-        Sequence seq_;
-        std::size_t idx_;
-        value_type val_;
-
-      public:
-        cast_seq_iterator() = default;
-
-        explicit cast_seq_iterator(Sequence seq, std::size_t idx) : seq_(seq), idx_(idx) {
-            if (idx_ < seq_.size()) {
-                val_ = seq_[idx_];
-            }
-        }
-
-        friend bool operator==(const It &a, const It &b) { return a.idx_ == b.idx_; }
-        friend bool operator!=(const It &a, const It &b) { return !(a == b); }
-
-        reference operator*() const { return val_; }
-        pointer operator->() const { return &val_; }
-
-        It &operator++() {
-            ++idx_;
-            if (idx_ < seq_.size()) {
-                val_ = seq_[idx_];
-            }
-            return *this;
-        }
-        It operator++(int) {
-            auto copy = *this;
-            ++(*this);
-            return copy;
-        }
-    };
-
   public:
     using value_type = std::remove_reference_t<T>;
-    using const_iterator = cast_seq_iterator;
+    using const_iterator = cast_random_access_iterator<value_type, detail::sequence_item_policy>;
 
     template <typename V>
     using IsT =
@@ -86,17 +45,64 @@ template <typename T> class Sequence : public sequence_base {
     using sequence_base::check_;
     using sequence_base::sequence_base;
 
-    value_type operator[](size_t index) const {
-        PyObject *result = PySequence_GetItem(ptr(), static_cast<Py_ssize_t>(index));
-        if (!result) {
+    // NOTE: exact lists and tuples are read directly, other sequences go through the
+    // sequence protocol.
+    size_t size() const {
+        if (PyList_CheckExact(m_ptr)) {
+            return static_cast<size_t>(PyList_GET_SIZE(m_ptr));
+        }
+        if (PyTuple_CheckExact(m_ptr)) {
+            return static_cast<size_t>(PyTuple_GET_SIZE(m_ptr));
+        }
+        auto n = PySequence_Size(m_ptr);
+        if (n < 0) {
             throw py::error_already_set();
         }
-        // NOTE: PySequence_GetItem() returns a new reference instead of a borrowed reference,
-        // so we need to steal the reference.
-        return cast_from_handle_steal<value_type>(py::handle(result));
+        return static_cast<size_t>(n);
+    }
+    value_type operator[](size_t index) const {
+        return detail::sequence_item_policy::get<value_type>(ptr(),
+                                                             static_cast<Py_ssize_t>(index));
     }
     const_iterator begin() const { return const_iterator(*this, 0); }
-    const_iterator end() const { return const_iterator(*this, PySequence_Size(m_ptr)); }
+    const_iterator end() const { return const_iterator(*this, static_cast<Py_ssize_t>(size())); }
+
+    // returns a zero-copy view of the sequence if it is a buffer of contiguous numbers of the
+    // same type (e.g. array.array or a 1D numpy array), otherwise returns an empty optional.
+    template <typename U = value_type, std::enable_if_t<std::is_arithmetic_v<U>, int> = 0>
+    std::optional<buffer_span<U>> as_span() const {
+        return buffer_span<U>::from_object(*this);
+    }
+
+    // convert all elements to a vector, copying the memory directly for compatible buffers
+    std::vector<value_type> to_vector() const {
+        if constexpr (std::is_arithmetic_v<value_type>) {
+            if (auto span = as_span()) {
+                return std::vector<value_type>(span->begin(), span->end());
+            }
+        }
+        std::vector<value_type> ans;
+        auto n = size();
+        ans.reserve(n);
+        if (PyList_CheckExact(m_ptr)) {
+            // converting an item may run Python code that resizes the list, so check the size
+            // on every iteration
+            for (Py_ssize_t idx = 0; idx < PyList_GET_SIZE(m_ptr); ++idx) {
+                ans.push_back(
+                    cast_from_handle<value_type>(py::handle(PyList_GET_ITEM(m_ptr, idx))));
+            }
+        } else if (PyTuple_CheckExact(m_ptr)) {
+            for (Py_ssize_t idx = 0; idx < static_cast<Py_ssize_t>(n); ++idx) {
+                ans.push_back(
+                    cast_from_handle<value_type>(py::handle(PyTuple_GET_ITEM(m_ptr, idx))));
+            }
+        } else {
+            for (std::size_t idx = 0; idx < n; ++idx) {
+                ans.push_back((*this)[idx]);
+            }
+        }
+        return ans;
+    }
 };
 
 } // namespace pybind11_generics
@@ -22,6 +22,7 @@
 #include <utility>
 
 #include <pybind11_generics/cast.h>
+#include <pybind11_generics/cast_random_access_iterator.h>
 #include <pybind11_generics/type_name.h>
 
 namespace py = pybind11;
@@ -52,8 +53,33 @@ template <Py_ssize_t n> struct set_tuple {
     constexpr void operator()(PyObject *tup) {}
 };
 
+// element type of tuples whose elements all have the same type
+template <typename... T> struct common_element { static constexpr bool value = false; };
+
+template <typename T0, typename... Ts> struct common_element<T0, Ts...> {
+    static constexpr bool value = (std::is_same_v<T0, Ts> && ...);
+    using type = T0;
+};
+
 } // namespace detail
 
+// A view of the elements of a tuple that converts them on dereference.
+template <typename T> class tuple_view {
+  public:
+    using value_type = T;
+    using const_iterator = cast_random_access_iterator<T, detail::tuple_item_policy>;
+
+  private:
+    py::tuple tup_;
+
+  public:
+    explicit tuple_view(py::tuple tup) : tup_(std::move(tup)) {}
+
+    const_iterator begin() const { return const_iterator(tup_, 0); }
+    const_iterator end() const { return const_iterator(tup_, PyTuple_GET_SIZE(tup_.ptr())); }
+    std::size_t size() const { return static_cast<std::size_t>(PyTuple_GET_SIZE(tup_.ptr())); }
+};
+
 using tuple_base = py::tuple;
 
 template <typename... T> class Tuple : public tuple_base {
@@ -68,15 +94,23 @@ template <typename... T> class Tuple : public tuple_base {
 
     explicit Tuple(size_t size = 0) : tuple_base(sizeof...(T)) {}
 
-    template <std::size_t I> std::tuple_element_t<I, std::tuple<T...>> get() const {
-        PyObject *result = PyTuple_GetItem(ptr(), static_cast<Py_ssize_t>(I));
-        if (!result) {
-            throw py::error_already_set();
-        }
+    // converting view of the elements, only available if all elements have the same type.
+    // NOTE: begin()/end() are inherited from py::tuple and iterate over handles.
+    template <typename U = detail::common_element<T...>, std::enable_if_t<U::value, int> = 0>
+    tuple_view<std::remove_reference_t<typename U::type>> values() const {
+        return tuple_view<std::remove_reference_t<typename U::type>>(*this);
+    }
 
-        return cast_from_handle<std::tuple_element_t<I, std::tuple<T...>>>(py::handle(result));
+    // NOTE: the length is checked on construction, so items are read without bounds checks.
+    template <std::size_t I> std::tuple_element_t<I, std::tuple<T...>> get() const {
+        static_assert(I < sizeof...(T), "Tuple index out of range.");
+        return cast_from_handle<std::tuple_element_t<I, std::tuple<T...>>>(
+            py::handle(PyTuple_GET_ITEM(ptr(), static_cast<Py_ssize_t>(I))));
     }
 
+    // convert all elements at once
+    std::tuple<T...> to_tuple() const { return to_tuple_helper(std::index_sequence_for<T...>{}); }
+
     static Tuple make_tuple(T &&... args) {
         PyObject *result = PyTuple_New((Py_ssize_t)sizeof...(T));
         detail::set_tuple<0>{}(result, args...);
@@ -90,8 +124,20 @@ template <typename... T> class Tuple : public tuple_base {
 
         return {result, stolen_t{}};
     }
+
+  private:
+    template <std::size_t... I> std::tuple<T...> to_tuple_helper(std::index_sequence<I...>) const {
+        return std::tuple<T...>(cast_from_handle<T>(
+            py::handle(PyTuple_GET_ITEM(ptr(), static_cast<Py_ssize_t>(I))))...);
+    }
 };
 
+// found by argument dependent lookup, like std::get()
+template <std::size_t I, typename... T>
+std::tuple_element_t<I, std::tuple<T...>> get(const Tuple<T...> &tup) {
+    return tup.template get<I>();
+}
+
 } // namespace pybind11_generics
 
 namespace std {
@@ -17,7 +17,10 @@
 #ifndef PYBIND11_GENERICS_UNION_H
 #define PYBIND11_GENERICS_UNION_H
 
+#include <memory>
 #include <optional>
+#include <type_traits>
+#include <utility>
 #include <variant>
 
 #include <string>
@@ -32,8 +35,14 @@ namespace pybind11_generics {
 using union_base = py::object;
 
 template <typename... T> class Union : public union_base {
+  public:
+    using variant_type = std::variant<T...>;
+
   private:
-    mutable std::optional<std::size_t> index_;
+    friend class py::detail::type_caster<Union>;
+
+    // the converted value, shared between copies
+    mutable std::shared_ptr<variant_type> value_;
 
     template <typename... U> struct type_list {};
 
@@ -59,26 +68,56 @@ template <typename... T> class Union : public union_base {
         return (tmp.has_value()) ? tmp : find_index(src, 0, true, type_list<T...>{});
     }
 
+    // same search as find_index(), but keeps the value of the matching caster
+    template <std::size_t I>
+    static std::shared_ptr<variant_type> load_value(handle src, bool convert) {
+        if constexpr (I == sizeof...(T)) {
+            return {};
+        } else {
+            using U = std::variant_alternative_t<I, variant_type>;
+            auto caster = py::detail::make_caster<U>();
+            if (caster.load(src, convert))
+                return std::make_shared<variant_type>(
+                    std::in_place_index<I>, py::detail::cast_op<U>(std::move(caster)));
+            return load_value<I + 1>(src, convert);
+        }
+    }
+
+    static std::shared_ptr<variant_type> load_value(const handle &src) {
+        auto tmp = load_value<0>(src, false);
+        return (tmp) ? tmp : load_value<0>(src, true);
+    }
+
   public:
     static bool check_(const handle &h) { return find_index(h).has_value(); }
 
-    template <class... Args>
-    Union(Args &&... args) : union_base(std::forward<Args>(args)...), index_{} {}
+    // NOTE: exclude copies and moves, so they share the converted value
+    template <class... Args,
+              std::enable_if_t<!(sizeof...(Args) == 1 &&
+                                 (std::is_same_v<std::decay_t<Args>, Union> && ...)),
+                               int> = 0>
+    Union(Args &&... args) : union_base(std::forward<Args>(args)...), value_{} {}
+
+    // returns the converted value.  The conversion is done at most once, and is already done
+    // if this Union is a function argument.
+    const variant_type &value() const {
+        if (!value_) {
+            value_ = load_value(*this);
+            if (!value_)
+                throw py::type_error("Invalid union data type.");
+        }
+        return *value_;
+    }
+
+    std::size_t index() const { return value().index(); }
 
-    std::size_t index() const {
-        if (index_.has_value())
-            return index_.value();
-        index_ = find_index(*this);
-        if (!index_.has_value())
-            throw py::type_error("Invalid union data type.");
-        return index_.value();
+    template <std::size_t I> std::variant_alternative_t<I, variant_type> get() const {
+        return std::get<I>(value());
     }
 
-    template <std::size_t I> std::variant_alternative_t<I, std::variant<T...>> get() {
-        if (I != index())
-            throw std::bad_variant_access("Accessing invalid value in union.");
-        return cast_from_handle<std::variant_alternative_t<I, std::variant<T...>>>(
-            py::handle(ptr()));
+    // calls f with the converted value, like std::visit()
+    template <typename F> decltype(auto) visit(F &&f) const {
+        return std::visit(std::forward<F>(f), value());
     }
 };
 
@@ -91,6 +130,25 @@ template <typename... T> struct handle_type_name<pybind11_generics::Union<T...>>
     static constexpr auto name = _("Union[") + concat(py::detail::make_caster<T>::name...) + _("]");
 };
 
+// loads the matching alternative once during overload resolution, so the bound function does
+// not need to convert the argument again.
+template <typename... T>
+class type_caster<pybind11_generics::Union<T...>,
+                  enable_if_t<is_pyobject<pybind11_generics::Union<T...>>::value>>
+    : public pyobject_caster<pybind11_generics::Union<T...>> {
+  public:
+    using type = pybind11_generics::Union<T...>;
+
+    bool load(handle src, bool /* convert */) {
+        auto val = type::load_value(src);
+        if (!val)
+            return false;
+        this->value = reinterpret_borrow<type>(src);
+        this->value.value_ = std::move(val);
+        return true;
+    }
+};
+
 } // namespace detail
 } // namespace pybind11
 
@@ -16,18 +16,43 @@
 """This package provides classes for building pybind11 extensions.
 """
 
+import hashlib
+import json
 import os
 import platform
+import queue
 import re
+import shutil
 import subprocess as sp
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from packaging import version
 from setuptools import Extension
 from setuptools.command.build_ext import build_ext
 
+# environment variables that affect the CMake configure step
+configure_env_vars = (
+    "CC",
+    "CXX",
+    "CFLAGS",
+    "CXXFLAGS",
+    "LDFLAGS",
+    "CMAKE_PREFIX_PATH",
+    "CMAKE_TOOLCHAIN_FILE",
+    "PKG_CONFIG_PATH",
+)
+# name of the file in the build tree that records the configure fingerprint
+configure_stamp_name = ".pybind11ext_configure"
+# output file suffixes of compile and link steps in Ninja logs
+compile_suffixes = (".o", ".obj")
+link_suffixes = (".so", ".pyd", ".dylib", ".dll", ".a", ".lib")
+
 
 class CMakePyBind11Extension(Extension):
     def __init__(self, name: str, *, sourcedir: str = ".", gen_stubs: bool = True) -> None:
@@ -41,8 +66,36 @@ class CMakePyBind11Build(build_ext):
         super().__init__(*args, **kwargs)
 
         # get build parameters from environment variables
-        self.build_type: str = os.environ.get("PYBIND11EXT_BUILD_TYPE", "Debug")
+        # Python training script for profile guided optimization.  If given, extensions are
+        # built with instrumentation, trained, then rebuilt with the profile and IPO/LTO.
+        self.pgo_training: str = os.environ.get("PYBIND11EXT_BUILD_PGO_TRAINING", "")
+        self.build_type: str = os.environ.get(
+            "PYBIND11EXT_BUILD_TYPE", "Release" if self.pgo_training else "Debug"
+        )
         self.build_log: str = os.environ.get("PYBIND11EXT_BUILD_LOG", "")
+        # JSON report of build times and binary sizes, written next to the build log by default
+        self.build_report: str = os.environ.get("PYBIND11EXT_BUILD_REPORT", "")
+        if not self.build_report and self.build_log:
+            log_path = Path(self.build_log)
+            self.build_report = str(log_path.with_name(f"{log_path.stem}.report.json"))
+        # compiler cache and CMake generator.  "auto" uses ccache/sccache and Ninja if found,
+        # "none" disables them.
+        self.launcher: str = find_program(
+            os.environ.get("PYBIND11EXT_BUILD_LAUNCHER", "auto"), ("ccache", "sccache")
+        )
+        self.generator: str = os.environ.get("PYBIND11EXT_BUILD_GENERATOR", "auto")
+        if self.generator == "auto":
+            # NOTE: keep the Visual Studio generator on Windows, it is what users expect
+            use_ninja = platform.system() != "Windows" and shutil.which("ninja") is not None
+            self.generator = "Ninja" if use_ninja else ""
+        elif self.generator == "none":
+            self.generator = ""
+        self._cmake_version = ""
+        # current profile guided optimization step, either "", "GENERATE", or "USE"
+        self._pgo_step = ""
+        # build report entries of each extension
+        self._report: Dict[str, Dict[str, Any]] = {}
+        self._log_lock = threading.Lock()
 
     def initialize_options(self) -> None:
         super().initialize_options()
@@ -55,10 +108,19 @@ class CMakePyBind11Build(build_ext):
             test_val = os.cpu_count()
             self.parallel = 1 if test_val is None else max(test_val // 2, 1)
 
+        # number of extensions to build at the same time.  self.parallel is the total job
+        # budget shared by all concurrent builds.
+        self.concurrent: int = int(os.environ.get("PYBIND11EXT_BUILD_CONCURRENT", 0))
+        if self.concurrent < 0:
+            raise ValueError("PYBIND11EXT_BUILD_CONCURRENT must be nonnegative.")
+        if self.concurrent == 0:
+            self.concurrent = self.parallel
+
     def run(self) -> None:
         version_check_cmd = ["cmake", "--version"]
         try:
             out = sp.check_output(version_check_cmd)
+            self._cmake_version = out.decode().strip()
         except OSError:
             err = RuntimeError(
                 "CMake must be installed to build the following extensions: "
@@ -82,67 +144,494 @@ class CMakePyBind11Build(build_ext):
                 self._log(str(err), error=True)
                 raise err
 
-        for ext in self.extensions:
-            self.build_extension(ext)
+        start_time = time.perf_counter()
+        try:
+            if self.pgo_training:
+                self._build_pgo()
+            else:
+                self._build_all()
 
-    def build_extension(self, ext: CMakePyBind11Extension) -> None:
-        # setup CMake initialization and build commands
+            self.gen_stubs()
+        finally:
+            # write the report even if the build failed, to see how far it got
+            if self.build_report:
+                self._write_report(time.perf_counter() - start_time)
+
+    def _build_all(self) -> None:
+        num_workers = min(self.concurrent, self.parallel, len(self.extensions))
+        if num_workers <= 1:
+            for ext in self.extensions:
+                self.build_extension(ext)
+        else:
+            self._build_concurrently(num_workers)
+
+    def _build_pgo(self) -> None:
+        """Build all extensions with profile guided optimization and IPO/LTO.
+
+        Extensions are first built with instrumentation, then the training script is run
+        against them to collect profile data, then they are rebuilt using the profile.  The
+        instrumentation flags are added by the pybind11_generics CMake target.
+        """
+        training_script = str(Path(self.pgo_training).resolve())
+        if not Path(training_script).is_file():
+            raise ValueError(f"Cannot find PGO training script: {self.pgo_training}")
+
+        pgo_dir = self._get_pgo_dir()
+        # remove stale profile data of previous runs
+        shutil.rmtree(pgo_dir, ignore_errors=True)
+        pgo_dir.mkdir(parents=True, exist_ok=True)
+
+        try:
+            self._pgo_step = "GENERATE"
+            self._build_all()
+
+            # NOTE: use python sub-process so we load the instrumented extensions.
+            env = dict(os.environ)
+            pkg_root_dirs = {self._get_pkg_root_dir(ext) for ext in self.extensions}
+            python_path = [*sorted(pkg_root_dirs), env.get("PYTHONPATH", "")]
+            env["PYTHONPATH"] = os.pathsep.join(val for val in python_path if val)
+            train_cmd = [sys.executable, training_script]
+            self._log(f"PGO training command:\n{' '.join(train_cmd)}")
+            sp.check_call(train_cmd, env=env)
+            merge_clang_profiles(pgo_dir)
+
+            self._pgo_step = "USE"
+            self._build_all()
+        finally:
+            self._pgo_step = ""
+
+    def _get_pgo_dir(self) -> Path:
+        return Path(self.build_temp, "pgo").resolve()
+
+    def _get_pkg_root_dir(self, ext: CMakePyBind11Extension) -> str:
         ext_fullname = self.get_ext_fullname(ext.name)
         num_levels = len(ext_fullname.split("."))
         ext_fullpath = Path(self.get_ext_fullpath(ext.name)).resolve()
-        pkg_root_dir = ext_fullpath.parents[num_levels - 1]
-        ext_dir = ext_fullpath.parent
+        return str(ext_fullpath.parents[num_levels - 1])
+
+    def _build_concurrently(self, num_workers: int) -> None:
+        """Configure and build extensions in parallel.
+
+        The job budget is split between num_workers build slots, and each slot builds one
+        extension at a time, so the total number of jobs never exceeds self.parallel.  The
+        output of each build goes to its own log file.
+        """
+        slots: "queue.Queue[int]" = queue.Queue()
+        for idx in range(num_workers):
+            slots.put(self.parallel // num_workers + int(idx < self.parallel % num_workers))
+
+        def build(ext: CMakePyBind11Extension) -> None:
+            jobs = slots.get()
+            try:
+                self.build_extension(ext, jobs=jobs, log_file=self._get_ext_log(ext))
+            finally:
+                slots.put(jobs)
+
+        self._log(f"Building {len(self.extensions)} extensions with {num_workers} workers")
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = [executor.submit(build, ext) for ext in self.extensions]
+            for ext, future in zip(self.extensions, futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self._log(
+                        f"[{self.get_ext_fullname(ext.name)}] build failed, "
+                        f"see log file: {self._get_ext_log(ext)}",
+                        error=True,
+                    )
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise e
+
+    def _get_ext_log(self, ext: CMakePyBind11Extension) -> str:
+        ext_fullname = self.get_ext_fullname(ext.name)
+        if self.build_log:
+            log_path = Path(self.build_log)
+            return str(log_path.with_name(f"{log_path.stem}.{ext_fullname}{log_path.suffix}"))
+        return str(Path(self._get_ext_build_dir(ext), "build.log"))
+
+    def _get_ext_build_dir(self, ext: CMakePyBind11Extension) -> str:
+        """Returns the CMake build tree of the given extension in the current build step."""
+        ext_fullname = self.get_ext_fullname(ext.name)
+        return str(Path(self.build_temp, ext_fullname + (".pgo" if self._pgo_step else "")))
+
+    def build_extension(
+        self,
+        ext: CMakePyBind11Extension,
+        jobs: Optional[int] = None,
+        log_file: Optional[str] = None,
+    ) -> None:
+        """Configure and build the given extension.
+
+        Parameters
+        ----------
+        ext : CMakePyBind11Extension
+            the extension to build.
+        jobs : Optional[int]
+            number of build jobs.  Defaults to self.parallel.
+        log_file : Optional[str]
+            file to write CMake output to.  Defaults to self.build_log.
+        """
+        if jobs is None:
+            jobs = self.parallel
+        if log_file is None:
+            log_file = self.build_log
+
+        # setup CMake initialization and build commands
+        ext_fullname = self.get_ext_fullname(ext.name)
+        ext_dir = Path(self.get_ext_fullpath(ext.name)).resolve().parent
+        # NOTE: each extension gets its own build tree, so builds never share CMake caches.
+        # PGO builds use a separate tree, so they do not invalidate regular builds.  Both PGO
+        # steps must use the same tree, since GCC looks up profiles by object file path.
+        build_temp = self._get_ext_build_dir(ext)
         init_cmd = [
             "cmake",
             f"-S{ext.sourcedir}",
-            f"-B{self.build_temp}",
+            f"-B{build_temp}",
             f"-DCMAKE_LIBRARY_OUTPUT_DIRECTORY={ext_dir}",
             f"-DCMAKE_BUILD_TYPE={self.build_type}",
         ]
         build_cmd = [
             "cmake",
             "--build",
-            self.build_temp,
+            build_temp,
             "--",
         ]
 
+        if self.generator:
+            init_cmd.append(f"-G{self.generator}")
+        clear_stale_cmake_cache(build_temp, self.generator)
+        if self.launcher:
+            init_cmd.append(f"-DCMAKE_C_COMPILER_LAUNCHER={self.launcher}")
+            init_cmd.append(f"-DCMAKE_CXX_COMPILER_LAUNCHER={self.launcher}")
+        if self._pgo_step:
+            init_cmd.append(f"-DPYBIND11_GENERICS_PGO={self._pgo_step}")
+            init_cmd.append(f"-DPYBIND11_GENERICS_PGO_DIR={self._get_pgo_dir()}")
+            ipo = "ON" if self._pgo_step == "USE" else "OFF"
+            init_cmd.append(f"-DCMAKE_INTERPROCEDURAL_OPTIMIZATION={ipo}")
+
         # handle Windows CMake arguments
-        if platform.system() == "Windows":
+        if platform.system() == "Windows" and (
+            not self.generator or self.generator.startswith("Visual Studio")
+        ):
             if sys.maxsize > 2 ** 32:
                 init_cmd.append("-A")
                 init_cmd.append("x64")
             build_cmd.append("/m")
 
         # set up parallel build arguments
-        build_cmd.append(f"-j{self.parallel}")
+        build_cmd.append(f"-j{jobs}")
 
-        # run CMake
-        Path(self.build_temp).mkdir(parents=True, exist_ok=True)
+        # run CMake.  Only configure if the configure inputs changed since the last run.
+        # NOTE: the build step re-runs configure by itself if any CMakeLists.txt changed.
+        Path(build_temp).mkdir(parents=True, exist_ok=True)
+        stamp_file = Path(build_temp, configure_stamp_name)
+        fingerprint = get_configure_fingerprint(init_cmd, self._cmake_version)
+        need_configure = self.force or not is_configured(build_temp, fingerprint)
         cmd_sep = "  \\\n  "
-        self._log(f"[{ext_fullname}] CMake init command:\n{cmd_sep.join(init_cmd)}")
+        if need_configure:
+            self._log(f"[{ext_fullname}] CMake init command:\n{cmd_sep.join(init_cmd)}")
+        else:
+            self._log(f"[{ext_fullname}] CMake build tree is up to date, skipping configure")
         self._log(f"[{ext_fullname}] CMake build command:\n{' '.join(build_cmd)}")
 
-        if self.build_log:
-            with open(self.build_log, "a") as f:
+        ninja_log = Path(build_temp, ".ninja_log")
+        ninja_log_offset = ninja_log.stat().st_size if ninja_log.is_file() else 0
+        configure_time = 0.0
+        with open(log_file, "a") if log_file else nullcontext() as f:
+            if need_configure:
+                # remove the stamp first, so a failed configure is never considered up to date
+                if stamp_file.exists():
+                    stamp_file.unlink()
+                start_time = time.perf_counter()
                 sp.check_call(init_cmd, stdout=f, stderr=sp.STDOUT)
-                sp.check_call(build_cmd, stdout=f, stderr=sp.STDOUT)
-        else:
-            sp.check_call(init_cmd, stdout=None, stderr=sp.STDOUT)
-            sp.check_call(build_cmd, stdout=None, stderr=sp.STDOUT)
-
-        if ext.gen_stubs:
-            # generate python stub file
-            # NOTE: use python sub-process so we reload that pakage.
-            sp.check_call(
-                [sys.executable, "-m", "pybind11_generics.stubgen", str(pkg_root_dir), ext_fullname]
+                configure_time = time.perf_counter() - start_time
+                stamp_file.write_text(
+                    json.dumps(dict(fingerprint=fingerprint, generator=self.generator))
+                )
+            start_time = time.perf_counter()
+            sp.check_call(build_cmd, stdout=f, stderr=sp.STDOUT)
+            build_time = time.perf_counter() - start_time
+        self._log_cache_stats(ext_fullname, log_file)
+
+        # NOTE: compile and link times are only known with Ninja, and they are summed over all
+        # build steps, so they can exceed the build wall time with multiple jobs.
+        compile_time: Optional[float] = None
+        link_time: Optional[float] = None
+        if ninja_log.is_file():
+            compile_time, link_time = get_ninja_step_times(ninja_log, ninja_log_offset)
+        self._add_report_entry(
+            ext_fullname,
+            "builds",
+            dict(
+                pgo_step=self._pgo_step,
+                jobs=jobs,
+                configured=need_configure,
+                configure_seconds=configure_time,
+                build_seconds=build_time,
+                compile_seconds=compile_time,
+                link_seconds=link_time,
+            ),
+        )
+
+    def gen_stubs(self) -> None:
+        """Generate stub files of all extensions with gen_stubs set.
+
+        This runs after all extensions are built.  Stubs of all extensions in the same package
+        root are generated by a single stubgen process, so the interpreter startup and imports
+        are only paid once.
+        """
+        modules: Dict[str, List[str]] = {}
+        for ext in self.extensions:
+            if ext.gen_stubs:
+                modules.setdefault(self._get_pkg_root_dir(ext), []).append(
+                    self.get_ext_fullname(ext.name)
+                )
+
+        for idx, (pkg_root_dir, module_list) in enumerate(modules.items()):
+            # NOTE: use python sub-process so we load the newly built extensions.
+            stub_cmd = [sys.executable, "-m", "pybind11_generics.stubgen"]
+            # NOTE: keep the manifest out of the package root, so it is not installed.
+            root_hash = hashlib.sha256(pkg_root_dir.encode("utf-8")).hexdigest()[:16]
+            manifest_file = Path(self.build_temp, f"stubgen_manifest_{root_hash}.json").resolve()
+            stub_cmd.extend(("--manifest", str(manifest_file)))
+            if self.force:
+                stub_cmd.append("-f")
+            if len(module_list) > 1:
+                stub_cmd.extend(("-j", str(min(self.parallel, len(module_list)))))
+            profile_file = Path(self.build_temp, f"stubgen_profile_{idx}.json").resolve()
+            if self.build_report:
+                profile_file.parent.mkdir(parents=True, exist_ok=True)
+                stub_cmd.extend(("--profile", str(profile_file)))
+            stub_cmd.append(pkg_root_dir)
+            stub_cmd.extend(module_list)
+            self._log(f"Stub generation command:\n{' '.join(stub_cmd)}")
+            sp.check_call(stub_cmd)
+
+            if self.build_report:
+                with open(profile_file, "r") as f:
+                    profile = json.load(f)
+                for mod_profile in profile["modules"]:
+                    self._add_report_entry(
+                        mod_profile["module"], "stubgen_seconds", mod_profile["seconds"]
+                    )
+
+    def _add_report_entry(self, ext_fullname: str, key: str, val: Any) -> None:
+        """Record a value in the build report.  The "builds" key holds a list of builds."""
+        with self._log_lock:
+            entry = self._report.setdefault(ext_fullname, {})
+            if key == "builds":
+                entry.setdefault(key, []).append(val)
+            else:
+                entry[key] = val
+
+    def _write_report(self, wall_time: float) -> None:
+        extensions: Dict[str, Dict[str, Any]] = {}
+        for ext in self.extensions:
+            ext_fullname = self.get_ext_fullname(ext.name)
+            ext_fullpath = Path(self.get_ext_fullpath(ext.name)).resolve()
+            entry: Dict[str, Any] = dict(
+                binary=str(ext_fullpath),
+                binary_bytes=ext_fullpath.stat().st_size if ext_fullpath.is_file() else None,
+                builds=[],
+                stubgen_seconds=None,
             )
+            entry.update(self._report.get(ext_fullname, {}))
+            extensions[ext_fullname] = entry
+
+        report = dict(
+            build_type=self.build_type,
+            generator=self.generator,
+            launcher=self.launcher,
+            pgo=bool(self.pgo_training),
+            parallel=self.parallel,
+            concurrent=min(self.concurrent, self.parallel, len(self.extensions)),
+            cmake_version=self._cmake_version.split("\n", 1)[0],
+            wall_seconds=wall_time,
+            extensions=extensions,
+        )
+        self._log(f"Writing build report: {self.build_report}")
+        Path(self.build_report).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.build_report, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    def _log_cache_stats(self, ext_fullname: str, log_file: str) -> None:
+        """Write compiler cache statistics to the build log.
+
+        NOTE: statistics are cumulative over all builds that use the same cache.
+        """
+        stats_cmd = get_cache_stats_cmd(self.launcher)
+        if not stats_cmd:
+            return
+
+        msg = f"[{ext_fullname}] Compiler cache statistics:"
+        try:
+            if log_file:
+                with open(log_file, "a") as f:
+                    f.write(msg)
+                    f.write("\n")
+                    f.flush()
+                    sp.call(stats_cmd, stdout=f, stderr=sp.STDOUT)
+            else:
+                print(msg, flush=True)
+                sp.call(stats_cmd, stdout=None, stderr=sp.STDOUT)
+        except OSError:
+            # statistics are informational only, never fail the build for them
+            pass
 
     def _log(self, msg: str, error: bool = False) -> None:
         if error:
             msg = "[ERROR] " + msg
 
-        print(msg)
-        if self.build_log:
-            with open(self.build_log, "a") as f:
-                f.write(msg)
-                f.write("\n")
+        with self._log_lock:
+            print(msg)
+            if self.build_log:
+                with open(self.build_log, "a") as f:
+                    f.write(msg)
+                    f.write("\n")
+
+
+def find_program(name: str, candidates: Sequence[str]) -> str:
+    """Returns the full path of a build tool.
+
+    Parameters
+    ----------
+    name : str
+        the program name or path.  "auto" returns the first of candidates that is found, and
+        "none" or empty string disables the tool.
+    candidates : Sequence[str]
+        program names to search for in "auto" mode.
+
+    Returns
+    -------
+    path : str
+        the program path, or empty string if the tool is not used.
+    """
+    if name == "auto":
+        for candidate in candidates:
+            path = shutil.which(candidate)
+            if path is not None:
+                return path
+        return ""
+    if not name or name == "none":
+        return ""
+
+    path = shutil.which(name)
+    if path is None:
+        raise ValueError(f"Cannot find program: {name}")
+    return path
+
+
+def get_cache_stats_cmd(launcher: str) -> List[str]:
+    """Returns the command that prints statistics of the given compiler cache."""
+    name = Path(launcher).stem if launcher else ""
+    if name in ("ccache", "sccache"):
+        return [launcher, "--show-stats"]
+    return []
+
+
+def get_ninja_step_times(log_path: Path, offset: int) -> Tuple[float, float]:
+    """Returns the total compile and link time recorded in a Ninja log file.
+
+    Only steps logged after the given byte offset are counted, so the log size before a build
+    gives the steps of that build.
+    """
+    try:
+        with open(log_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            # Ninja rewrites its log when it gets too long, in which case read everything
+            f.seek(offset if offset <= f.tell() else 0)
+            lines = f.read().decode("utf-8", errors="replace").splitlines()
+    except OSError:
+        return 0.0, 0.0
+
+    compile_time = 0.0
+    link_time = 0.0
+    for line in lines:
+        # each line is: start time (ms), end time (ms), mtime, output, command hash
+        parts = line.split("\t")
+        if line.startswith("#") or len(parts) < 5:
+            continue
+        try:
+            seconds = (int(parts[1]) - int(parts[0])) / 1000
+        except ValueError:
+            continue
+        if parts[3].endswith(compile_suffixes):
+            compile_time += seconds
+        elif parts[3].endswith(link_suffixes):
+            link_time += seconds
+    return compile_time, link_time
+
+
+def get_configure_fingerprint(init_cmd: Sequence[str], cmake_version: str) -> str:
+    """Returns a hash of all inputs of the CMake configure step."""
+    hasher = hashlib.sha256()
+    for val in init_cmd:
+        hasher.update(f"{val}\0".encode("utf-8"))
+    hasher.update(f"{cmake_version}\0{sys.executable}\0".encode("utf-8"))
+    for name in configure_env_vars:
+        hasher.update(f"{name}={os.environ.get(name, '')}\0".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def read_configure_stamp(build_dir: str) -> Dict[str, str]:
+    """Returns the configure fingerprint and generator recorded in build_dir.
+
+    Returns an empty dictionary if build_dir has no valid configure stamp.
+    """
+    try:
+        with open(Path(build_dir, configure_stamp_name), "r") as f:
+            content = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return content if isinstance(content, dict) else {}
+
+
+def is_configured(build_dir: str, fingerprint: str) -> bool:
+    """Returns True if build_dir was configured with the given configure fingerprint."""
+    if not Path(build_dir, "CMakeCache.txt").is_file():
+        return False
+    return read_configure_stamp(build_dir).get("fingerprint", None) == fingerprint
+
+
+def merge_clang_profiles(pgo_dir: Path) -> None:
+    """Merge raw Clang profiles in pgo_dir into the default.profdata file Clang reads.
+
+    Does nothing for GCC, which reads its .gcda profile files directly.
+    """
+    raw_files = sorted(str(path) for path in pgo_dir.glob("*.profraw"))
+    if not raw_files:
+        return
+
+    profdata = find_program(
+        os.environ.get("PYBIND11EXT_BUILD_PROFDATA", "auto"), ("llvm-profdata",)
+    )
+    if not profdata:
+        raise RuntimeError("llvm-profdata must be installed to build with Clang PGO.")
+    sp.check_call([profdata, "merge", f"-output={pgo_dir / 'default.profdata'}", *raw_files])
+
+
+def clear_stale_cmake_cache(build_dir: str, generator: str) -> None:
+    """Remove the CMake cache of build_dir if it was configured with a different generator.
+
+    CMake refuses to switch generators in an existing build tree, which happens when Ninja is
+    installed or removed between builds.  An empty generator means the CMake default, whose
+    name is unknown, so in that case the cache is removed if the configure stamp shows that
+    an explicit generator was used before.
+    """
+    try:
+        with open(Path(build_dir, "CMakeCache.txt"), "r") as f:
+            content = f.read()
+    except OSError:
+        return
+
+    match = re.search(r"^CMAKE_GENERATOR:INTERNAL=(.*)$", content, re.MULTILINE)
+    if match is None:
+        return
+    if generator:
+        stale = match.group(1).strip() != generator
+    else:
+        stale = bool(read_configure_stamp(build_dir).get("generator", ""))
+    if stale:
+        Path(build_dir, "CMakeCache.txt").unlink()
+        shutil.rmtree(Path(build_dir, "CMakeFiles"), ignore_errors=True)
@@ -17,14 +17,21 @@
 
 import importlib
 import inspect
+import json
+import os
 import pkgutil
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Iterator, Sequence
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence
 
 import click
 
-from .stubgenc import generate_stub_for_c_module, is_c_module
+from .manifest import StubManifest
+from .parsedoc import parse_cache_info
+from .profiling import record_profile, summarize_profiles
+from .stubgenc import format_stub_files, generate_stub_for_c_module, is_c_module
 
 
 @click.command(context_settings={"help_option_names": ["-h", "--help"]})
@@ -32,25 +39,234 @@ from .stubgenc import generate_stub_for_c_module, is_c_module
 @click.argument("modules", nargs=-1)
 @click.option("-r", "--recursive", is_flag=True, help="Generate stubs for submodules as well.")
 @click.option("--ignore-errors", is_flag=True, help="Ignore errors during stub generation.")
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Number of worker processes.  0 uses all available CPUs.",
+)
+@click.option("-f", "--force", is_flag=True, help="Regenerate stubs even if they are up to date.")
+@click.option(
+    "--manifest",
+    "manifest_file",
+    default="",
+    help="Keep module fingerprints in this file, and skip stubs that are up to date.",
+)
+@click.option(
+    "--external-format",
+    is_flag=True,
+    help="Format stubs with the isort/black command line tools instead of in-process.",
+)
+@click.option(
+    "--type-aliases",
+    is_flag=True,
+    help="Replace repeated complex type expressions with module level type aliases.",
+)
+@click.option(
+    "--index",
+    "write_index",
+    is_flag=True,
+    help="Write a JSON signature index of each module next to its stub.",
+)
+@click.option(
+    "--profile",
+    "profile_file",
+    default="",
+    help="Write a JSON report of time spent in each stub generation phase to this file.",
+)
 def gen_pybind11_stubs(
-    output_dir: str, modules: Sequence[str], recursive: bool, ignore_errors: bool
+    output_dir: str,
+    modules: Sequence[str],
+    recursive: bool,
+    ignore_errors: bool,
+    jobs: int,
+    force: bool,
+    manifest_file: str,
+    external_format: bool,
+    type_aliases: bool,
+    write_index: bool,
+    profile_file: str,
 ) -> None:
     """Generate Python stubs for pybind11 modules MODULES and output them in OUTPUT_DIR."""
     output_path = Path(output_dir).resolve()
     if not output_path.is_dir():
         raise SystemExit(f"Cannot find directory: {output_dir}")
 
+    start_time = time.perf_counter()
     # NOTE: add output path to PYTHONPATH so we can import the module.
-    sys.path.insert(0, str(output_path))
-    for module in walk_packages(modules) if recursive else modules:
-        try:
-            target = generate_stub_for_c_module(module, output_path)
-            print(f"Created stub: {target}")
-        except Exception as e:
-            if not ignore_errors:
+    _add_sys_path(str(output_path))
+    module_list = list(walk_packages(modules)) if recursive else list(modules)
+    discover_time = time.perf_counter() - start_time
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    # NOTE: without a manifest, every stub is regenerated and nothing is fingerprinted
+    manifest = StubManifest.load(Path(manifest_file).resolve()) if manifest_file else None
+    if force and manifest is not None:
+        manifest.discard(module_list)
+
+    options: Dict[str, Any] = dict(
+        external_format=external_format, type_aliases=type_aliases, write_index=write_index
+    )
+    results: List[StubResult] = []
+    format_time = 0.0
+    try:
+        if jobs == 1 or len(module_list) < 2:
+            for module in module_list:
+                try:
+                    result = _gen_stub(module, output_path, manifest, options, bool(profile_file))
+                except Exception as e:
+                    if not ignore_errors:
+                        raise e
+                    else:
+                        print("Stub generation failed for: ", module, file=sys.stderr)
+                else:
+                    _record_result(result, manifest, results)
+        else:
+            _gen_stubs_parallel(
+                module_list,
+                output_path,
+                manifest,
+                options,
+                ignore_errors,
+                jobs,
+                profile_file,
+                results,
+            )
+
+        if external_format:
+            format_start = time.perf_counter()
+            try:
+                format_stub_files([result.target for result in results if result.updated])
+            except Exception as e:
+                # stubs are not formatted, so they are not up to date
+                if manifest is not None:
+                    manifest.discard(module for module in module_list if module in manifest.updated)
                 raise e
+            format_time = time.perf_counter() - format_start
+    finally:
+        # save progress even if some stubs failed
+        if manifest is not None:
+            manifest.save()
+
+    if profile_file:
+        report = summarize_profiles(
+            [result.profile for result in results if result.profile is not None],
+            jobs=jobs,
+            wall_seconds=time.perf_counter() - start_time,
+            discover_seconds=discover_time,
+            external_format_seconds=format_time,
+        )
+        with open(profile_file, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+class StubResult(NamedTuple):
+    """The result of generating a single stub."""
+
+    module: str
+    target: Path
+    # the manifest entry of this module
+    fingerprint: Optional[str]
+    # True if the stub was regenerated
+    updated: bool
+    profile: Optional[Dict[str, Any]]
+
+
+def _gen_stubs_parallel(
+    module_list: List[str],
+    output_path: Path,
+    manifest: Optional[StubManifest],
+    options: Mapping[str, Any],
+    ignore_errors: bool,
+    jobs: int,
+    profile_file: str,
+    results: List[StubResult],
+) -> None:
+    """Generate stubs using a process pool.
+
+    Results are reported in the order of module_list, so the output is deterministic no matter
+    which worker finishes first.
+    """
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(module_list)),
+        initializer=_add_sys_path,
+        initargs=(str(output_path),),
+    ) as executor:
+        futures = [
+            executor.submit(_gen_stub, module, output_path, manifest, options, bool(profile_file))
+            for module in module_list
+        ]
+        for module, future in zip(module_list, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                if not ignore_errors:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise e
+                else:
+                    print("Stub generation failed for: ", module, file=sys.stderr)
             else:
-                print("Stub generation failed for: ", module, file=sys.stderr)
+                _record_result(result, manifest, results)
+
+
+def _gen_stub(
+    module: str,
+    output_path: Path,
+    manifest: Optional[StubManifest],
+    options: Mapping[str, Any],
+    profile: bool,
+) -> StubResult:
+    """Generate a single stub.
+
+    This may run in a worker process with a copy of the manifest, so the manifest entry is
+    returned to be recorded in the parent process.
+    """
+    if not profile:
+        target = generate_stub_for_c_module(module, output_path, manifest=manifest, **options)
+        return _get_result(module, target, manifest, None)
+
+    cache_start = parse_cache_info()
+    with record_profile(module) as prof:
+        target = generate_stub_for_c_module(module, output_path, manifest=manifest, **options)
+    cache_end = parse_cache_info()
+    prof.count("parse_cache_hits", cache_end["hits"] - cache_start["hits"])
+    prof.count("parse_cache_misses", cache_end["misses"] - cache_start["misses"])
+    return _get_result(module, target, manifest, prof.to_dict())
+
+
+def _get_result(
+    module: str,
+    target: Path,
+    manifest: Optional[StubManifest],
+    profile: Optional[Dict[str, Any]],
+) -> StubResult:
+    if manifest is None:
+        # without a manifest, every stub is regenerated
+        return StubResult(module, target, None, True, profile)
+    return StubResult(module, target, manifest.get(module), module in manifest.updated, profile)
+
+
+def _record_result(
+    result: StubResult, manifest: Optional[StubManifest], results: List[StubResult]
+) -> None:
+    results.append(result)
+    if result.updated:
+        if manifest is not None and result.fingerprint is not None:
+            manifest.update(result.module, result.fingerprint)
+        print(f"Created stub: {result.target}")
+    else:
+        print(f"Stub is up to date: {result.target}")
+
+
+def _add_sys_path(path: str) -> None:
+    # NOTE: worker processes may not inherit sys.path (e.g. with the spawn start method),
+    # so this is also used as the process pool initializer.
+    if path not in sys.path:
+        sys.path.insert(0, path)
 
 
 def walk_packages(packages: Sequence[str]) -> Iterator[str]:
@@ -0,0 +1,225 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2021 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module replaces repeated complex type expressions in a stub with type aliases.
+
+Generic type hints such as Dict[str, List[Tuple[int, float]]] tend to be repeated verbatim in
+many signatures of a pybind11 module.  Declaring each of them once as a module level TypeAlias
+makes the stub smaller, and type checkers only need to analyze the expression once.
+"""
+
+import ast
+from itertools import chain
+from typing import Dict, List, Tuple
+
+from .parsedoc import add_edit, apply_edits, get_line_offsets
+
+# prefix of generated type alias names.  Aliases are private so they are not re-exported.
+alias_prefix = "_Alias"
+# minimum number of times an expression must appear to get an alias
+alias_min_count = 2
+# minimum number of names in an expression for it to get an alias
+alias_min_size = 4
+
+
+def get_annotations(body: List[ast.stmt], annotations: List[ast.expr]) -> None:
+    """Collect all type annotations in the given statements.
+
+    Only statements are traversed, since annotations cannot appear inside expressions.
+    """
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            args = node.args
+            for arg in chain(args.posonlyargs, args.args, args.kwonlyargs):
+                if arg.annotation is not None:
+                    annotations.append(arg.annotation)
+            for arg_opt in (args.vararg, args.kwarg):
+                if arg_opt is not None and arg_opt.annotation is not None:
+                    annotations.append(arg_opt.annotation)
+            if node.returns is not None:
+                annotations.append(node.returns)
+        elif isinstance(node, ast.AnnAssign):
+            annotations.append(node.annotation)
+        elif isinstance(node, ast.ClassDef):
+            get_annotations(node.body, annotations)
+        elif isinstance(node, ast.If):
+            get_annotations(node.body, annotations)
+            get_annotations(node.orelse, annotations)
+
+
+def extract_type_aliases(content: str) -> str:
+    """Replace repeated complex type expressions in the given stub with type aliases.
+
+    Larger expressions get aliases first.  A smaller expression only gets an alias if it
+    still appears enough times outside of expressions that were already replaced.
+
+    Parameters
+    ----------
+    content : str
+        the stub file content.
+
+    Returns
+    -------
+    content : str
+        the stub file content, with type alias declarations added after the imports.
+    """
+    module = ast.parse(content)
+    annotations: List[ast.expr] = []
+    get_annotations(module.body, annotations)
+
+    # find all subscript expressions in annotations
+    occurrences = ExpressionOccurrences(content)
+    for annotation in annotations:
+        occurrences.add(annotation, -1)
+
+    # select expressions to replace, largest first
+    by_key: Dict[str, List[int]] = {}
+    for idx, key in enumerate(occurrences.keys):
+        by_key.setdefault(key, []).append(idx)
+    candidates = [
+        key
+        for key, indices in by_key.items()
+        if len(indices) >= alias_min_count and occurrences.sizes[key] >= alias_min_size
+    ]
+    candidates.sort(key=lambda x: -occurrences.sizes[x])
+
+    selected = [False] * len(occurrences.keys)
+    alias_keys: List[str] = []
+    for key in candidates:
+        indices = [idx for idx in by_key[key] if not occurrences.is_covered(idx, selected)]
+        if len(indices) >= alias_min_count:
+            alias_keys.append(key)
+            for idx in indices:
+                selected[idx] = True
+
+    if not alias_keys:
+        return content
+
+    # assign alias names in order of first appearance, skipping names already in the stub
+    alias_keys.sort(key=lambda x: by_key[x][0])
+    aliases: Dict[str, str] = {}
+    idx = 0
+    for key in alias_keys:
+        name = f"{alias_prefix}{idx}"
+        while name in content:
+            idx += 1
+            name = f"{alias_prefix}{idx}"
+        aliases[key] = name
+        idx += 1
+
+    # replace expressions in annotations
+    edits: List[Tuple[int, int, int, int, str]] = []
+    for occ_idx, node in enumerate(occurrences.nodes):
+        if selected[occ_idx]:
+            add_edit(edits, node, aliases[occurrences.keys[occ_idx]])
+
+    # declare aliases after the imports, inner expressions first
+    alias_lines = ["", "from typing_extensions import TypeAlias", ""]
+    for key in sorted(alias_keys, key=lambda x: occurrences.sizes[x]):
+        expr = ast.parse(key, mode="eval").body
+        alias_edits: List[Tuple[int, int, int, int, str]] = []
+        for child in ast.iter_child_nodes(expr):
+            if isinstance(child, ast.expr):
+                _replace_expressions(child, aliases, alias_edits)
+        alias_lines.append(f"{aliases[key]}: TypeAlias = {apply_edits(key, alias_edits)}")
+    alias_lines.append("")
+
+    last_import = None
+    for stmt in module.body:
+        if isinstance(stmt, (ast.Import, ast.ImportFrom)):
+            last_import = stmt
+    if last_import is None or last_import.end_lineno is None:
+        edits.append((1, 0, 1, 0, "\n".join(alias_lines[1:]) + "\n"))
+    else:
+        lineno = last_import.end_lineno
+        col = last_import.end_col_offset or 0
+        edits.append((lineno, col, lineno, col, "\n".join(alias_lines)))
+
+    return apply_edits(content, edits)
+
+
+class ExpressionOccurrences:
+    """Records every subscript expression in a set of annotations, in pre-order.
+
+    Parameters
+    ----------
+    source : str
+        the source code the annotations are parsed from.
+    """
+
+    def __init__(self, source: str) -> None:
+        self._data = source.encode("utf-8")
+        self._line_offsets = get_line_offsets(self._data)
+        # source code of each occurrence
+        self.keys: List[str] = []
+        # index of the enclosing occurrence, -1 if none
+        self.parents: List[int] = []
+        # number of names in each expression
+        self.sizes: Dict[str, int] = {}
+        self.nodes: List[ast.expr] = []
+
+    def add(self, node: ast.expr, parent: int) -> int:
+        """Record all subscript expressions in node, returns the number of names in node."""
+        if isinstance(node, (ast.Name, ast.Attribute)):
+            return 1
+
+        occ_idx = -1
+        if isinstance(node, ast.Subscript):
+            occ_idx = len(self.keys)
+            self.keys.append("")
+            self.parents.append(parent)
+            self.nodes.append(node)
+            parent = occ_idx
+
+        size = 0
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.expr):
+                size += self.add(child, parent)
+
+        if occ_idx >= 0:
+            key = self._get_source(node)
+            self.keys[occ_idx] = key
+            self.sizes[key] = size
+        return size
+
+    def _get_source(self, node: ast.expr) -> str:
+        # NOTE: AST column offsets are in UTF-8 bytes.  Annotations in stubs never span
+        # multiple lines, but be safe and fall back to unparse.
+        if node.end_lineno != node.lineno or node.end_col_offset is None:
+            return ast.unparse(node)
+        offset = self._line_offsets[node.lineno - 1]
+        return self._data[offset + node.col_offset : offset + node.end_col_offset].decode("utf-8")
+
+    def is_covered(self, idx: int, selected: List[bool]) -> bool:
+        """Returns True if an enclosing occurrence is selected."""
+        idx = self.parents[idx]
+        while idx >= 0:
+            if selected[idx]:
+                return True
+            idx = self.parents[idx]
+        return False
+
+
+def _replace_expressions(
+    node: ast.expr, aliases: Dict[str, str], edits: List[Tuple[int, int, int, int, str]]
+) -> None:
+    if isinstance(node, ast.Subscript):
+        name = aliases.get(ast.unparse(node), None)
+        if name is not None:
+            add_edit(edits, node, name)
+            return
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, ast.expr):
+            _replace_expressions(child, aliases, edits)
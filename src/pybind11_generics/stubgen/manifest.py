@@ -0,0 +1,159 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2021 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module keeps track of which stub files are up to date.
+
+The manifest is a JSON file that maps each module name to a fingerprint of everything the
+generated stub depends on: the extension binary, the docstrings of all module members, the
+versions of stubgen and the formatting tools, and the formatting configuration.  If the
+fingerprint of a module did not change since the last run, its stub does not need to be
+regenerated.
+
+The manifest should not be stored in the stub output directory, since that is usually a
+package root that gets installed.
+"""
+
+import hashlib
+import importlib.metadata
+import inspect
+import json
+from functools import lru_cache
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Iterable, Optional, Set
+
+# version of the manifest file format
+manifest_version = 1
+
+
+class StubManifest:
+    """The stub generation manifest of an output directory.
+
+    Parameters
+    ----------
+    path : Path
+        the manifest file path.
+    entries : Optional[Dict[str, str]]
+        mapping from module name to fingerprint.
+    """
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, str]] = None) -> None:
+        self.path = path
+        self._entries: Dict[str, str] = {} if entries is None else entries
+        # modules whose stubs were regenerated in this run
+        self.updated: Set[str] = set()
+
+    @classmethod
+    def load(cls, path: Path) -> "StubManifest":
+        """Load the manifest from the given file.
+
+        A missing or unreadable manifest results in an empty manifest, so every stub
+        is regenerated.
+        """
+        try:
+            with open(path, "r") as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+
+        if not isinstance(content, dict) or content.get("version", None) != manifest_version:
+            return cls(path)
+        entries = content.get("modules", None)
+        if not isinstance(entries, dict):
+            return cls(path)
+        return cls(path, {str(k): str(v) for k, v in entries.items()})
+
+    def save(self) -> None:
+        content = {
+            "version": manifest_version,
+            "modules": dict(sorted(self._entries.items(), key=lambda x: x[0])),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(content, f, indent=2)
+            f.write("\n")
+
+    def get(self, module_name: str) -> Optional[str]:
+        return self._entries.get(module_name, None)
+
+    def update(self, module_name: str, fingerprint: str) -> None:
+        self._entries[module_name] = fingerprint
+        self.updated.add(module_name)
+
+    def discard(self, module_names: Iterable[str]) -> None:
+        """Forget the given modules, so their stubs are regenerated."""
+        for name in module_names:
+            self._entries.pop(name, None)
+
+    def is_up_to_date(self, module_name: str, fingerprint: str, target: Path) -> bool:
+        return target.is_file() and self._entries.get(module_name, None) == fingerprint
+
+
+def get_module_fingerprint(module: ModuleType, options: str = "") -> str:
+    """Returns a hash of everything the stub of the given module depends on.
+
+    options is a string representation of the stub generation options.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(get_tool_versions().encode("utf-8"))
+    hasher.update(module.__name__.encode("utf-8"))
+    hasher.update(options.encode("utf-8"))
+
+    # hash the extension binary
+    fname = module.__dict__.get("__file__", None)
+    if fname is not None:
+        with open(fname, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(chunk)
+
+    # hash docstrings of all members, as those are what the stub is generated from
+    for name, obj in sorted(module.__dict__.items(), key=lambda x: x[0]):
+        if inspect.ismodule(obj):
+            # submodules have their own stubs
+            continue
+        _hash_member(hasher, name, obj)
+        if inspect.isclass(obj):
+            hasher.update(",".join(base.__qualname__ for base in obj.mro()).encode("utf-8"))
+            for mem_name, mem_obj in sorted(obj.__dict__.items(), key=lambda x: x[0]):
+                _hash_member(hasher, mem_name, mem_obj)
+
+    return hasher.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def get_tool_versions() -> str:
+    """Returns the versions of stubgen and the formatting tools."""
+    return ";".join(
+        f"{name}={_get_version(name)}" for name in ("pybind11_generics", "black", "isort")
+    )
+
+
+def _get_version(package: str) -> str:
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _hash_member(hasher: Any, name: str, obj: object) -> None:
+    obj_type = type(obj)
+    doc = getattr(obj, "__doc__", None)
+    hasher.update(f"\0{name}\0{obj_type.__module__}.{obj_type.__qualname__}\0".encode("utf-8"))
+    if isinstance(doc, str):
+        hasher.update(doc.encode("utf-8"))
+    # property docstrings live on the getter in some pybind11 versions
+    fget = getattr(obj, "fget", None)
+    if fget is not None and isinstance(getattr(fget, "__doc__", None), str):
+        hasher.update(fget.__doc__.encode("utf-8"))
@@ -16,8 +16,11 @@
 """This module handles parsing type hinting information from pybind11 docstrings."""
 
 import ast
+from functools import lru_cache
 from itertools import chain, islice
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .profiling import profile_count, profile_phase
 
 # list of classes we need to import from typing package if present
 typing_imports = (
@@ -31,6 +34,8 @@ typing_imports = (
     "Iterator",
     "Sequence",
 )
+# maximum number of parsed declarations to cache
+parse_cache_size = 8192
 
 
 class PkgClsParser(ast.NodeVisitor):
@@ -112,15 +117,168 @@ class ImportsParser(ast.NodeVisitor):
             self.visit(node.annotation)
 
 
+class NameReplacer(ast.NodeVisitor):
+    """This parser finds the locations of all full path class names that should be replaced.
+
+    Only whole attribute nodes are replaced, so replacing "pkg.A" never touches "pkg.AB".
+    """
+
+    def __init__(self, source: str, replacements: Dict[str, str]) -> None:
+        ast.NodeVisitor.__init__(self)
+
+        self._source = source
+        self._replacements = replacements
+        self._line_offsets: List[int] = []
+        # list of (lineno, col_offset, end_lineno, end_col_offset, replacement)
+        self.edits: List[Tuple[int, int, int, int, str]] = []
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        to_str = self._replacements.get(get_dotted_name(node), None)
+        if to_str is None:
+            self.generic_visit(node)
+        else:
+            add_edit(self.edits, node, to_str)
+
+    def visit_Constant(self, node: ast.Constant) -> None:
+        # type annotation could be string
+        val = node.value
+        if isinstance(val, str) and val:
+            try:
+                body = ast.parse(val).body
+            except SyntaxError:
+                return
+            if body:
+                new_val = replace_names(val, body[0], self._replacements)
+                if new_val != val:
+                    add_edit(self.edits, node, self._quote(node, new_val))
+
+    def _quote(self, node: ast.Constant, val: str) -> str:
+        # keep the original quote style if possible
+        data = self._source.encode("utf-8")
+        if not self._line_offsets:
+            self._line_offsets = get_line_offsets(data)
+        idx = self._line_offsets[node.lineno - 1] + node.col_offset
+        quote = data[idx : idx + 1].decode("utf-8")
+        if quote in ("'", '"') and quote not in val and "\\" not in val:
+            return quote + val + quote
+        return repr(val)
+
+
+def get_dotted_name(node: ast.expr) -> str:
+    """Returns the dotted name of the given attribute node, or empty string if not a name."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return ""
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def add_edit(edits: List[Tuple[int, int, int, int, str]], node: ast.AST, to_str: str) -> None:
+    """Record an edit that replaces the source of the given node with to_str."""
+    lineno = getattr(node, "lineno", None)
+    col_offset = getattr(node, "col_offset", None)
+    end_lineno = getattr(node, "end_lineno", None)
+    end_col_offset = getattr(node, "end_col_offset", None)
+    if (
+        lineno is not None
+        and col_offset is not None
+        and end_lineno is not None
+        and end_col_offset is not None
+    ):
+        edits.append((lineno, col_offset, end_lineno, end_col_offset, to_str))
+
+
+def get_line_offsets(data: bytes) -> List[int]:
+    """Returns the byte offset of the start of every line in data."""
+    line_offsets = [0]
+    for line in data.splitlines(keepends=True):
+        line_offsets.append(line_offsets[-1] + len(line))
+    return line_offsets
+
+
+def apply_edits(orig_str: str, edits: Sequence[Tuple[int, int, int, int, str]]) -> str:
+    """Apply non-overlapping edits on orig_str in a single pass.
+
+    Each edit is a (lineno, col_offset, end_lineno, end_col_offset, replacement) tuple,
+    with positions following the conventions of AST nodes parsed from orig_str.
+    """
+    if not edits:
+        return orig_str
+
+    # NOTE: AST column offsets are in UTF-8 bytes
+    data = orig_str.encode("utf-8")
+    line_offsets = get_line_offsets(data)
+
+    chunks = []
+    cur_idx = 0
+    for lineno, col, end_lineno, end_col, to_str in sorted(edits, key=lambda x: x[:4]):
+        start_idx = line_offsets[lineno - 1] + col
+        chunks.append(data[cur_idx:start_idx])
+        chunks.append(to_str.encode("utf-8"))
+        cur_idx = line_offsets[end_lineno - 1] + end_col
+    chunks.append(data[cur_idx:])
+    return b"".join(chunks).decode("utf-8")
+
+
+def replace_names(orig_str: str, node: ast.AST, replacements: Dict[str, str]) -> str:
+    """Replace full path class names in orig_str, in a single pass.
+
+    node must be the parsed AST of orig_str, and replacements maps full path class names
+    to their new names.  The rest of orig_str is left untouched.
+    """
+    replacer = NameReplacer(orig_str, replacements)
+    replacer.visit(node)
+    return apply_edits(orig_str, replacer.edits)
+
+
 def process_ast_node(orig_str: str, node: ast.AST, imports: Dict[str, str]) -> str:
     # record all imports
     imp_parser = ImportsParser(imports)
     imp_parser.visit(node)
 
     # remove package name from full path class name
-    for from_str, to_str in imp_parser.replacements.items():
-        orig_str = orig_str.replace(from_str, to_str)
-    return orig_str
+    if not imp_parser.replacements:
+        return orig_str
+    return replace_names(orig_str, node, imp_parser.replacements)
+
+
+@lru_cache(maxsize=parse_cache_size)
+def parse_declaration(declaration: str) -> Optional[Tuple[str, Tuple[Tuple[str, str], ...]]]:
+    """Parse a type or function declaration and remove package names from class names.
+
+    The same declarations appear many times in a module (e.g. overloads and common property
+    types), so results are cached.  Use parse_cache_info() to get cache statistics.
+
+    Parameters
+    ----------
+    declaration : str
+        the declaration string, with no leading or trailing whitespace.
+
+    Returns
+    -------
+    result : Optional[Tuple[str, Tuple[Tuple[str, str], ...]]]
+        the rewritten declaration and the (class name, module name) pairs to import.  None if
+        the declaration fails to parse or is empty.
+    """
+    try:
+        body = ast.parse(declaration).body
+    except SyntaxError:
+        return None
+    if not body:
+        return None
+
+    imports: Dict[str, str] = {}
+    ans = process_ast_node(declaration, body[0], imports)
+    return ans, tuple(imports.items())
+
+
+def parse_cache_info() -> Dict[str, int]:
+    """Returns the hit/miss statistics of the declaration cache."""
+    info = parse_declaration.cache_info()
+    return dict(hits=info.hits, misses=info.misses, size=info.currsize, maxsize=parse_cache_size)
 
 
 def get_prop_type(docstr: str, imports: Dict[str, str]) -> str:
@@ -151,15 +309,14 @@ def get_prop_type(docstr: str, imports: Dict[str, str]) -> str:
     # remove white spaces
     type_str = docstr.split("\n", 1)[0].rsplit(":", 1)[0].strip()
 
-    try:
-        type_body = ast.parse(type_str).body
-        if type_body:
-            # parse successful and found content, record all imports
-            return process_ast_node(type_str, type_body[0], imports)
-    except SyntaxError:
-        # parsing failed; fallback to default return value
-        pass
+    with profile_phase("parse_docstring"):
+        result = parse_declaration(type_str)
+    if result is not None:
+        # parse successful and found content, record all imports
+        imports.update(result[1])
+        return result[0]
 
+    # parsing failed; fallback to default return value
     imports["Any"] = "typing"
     return "Any"
 
@@ -197,6 +354,7 @@ def write_function_stubs(
                     )
                 )
                 cnt += 1
+        profile_count("overloads", cnt - 1)
 
     else:
         output.append(
@@ -211,12 +369,12 @@ def process_function_def(
     cls_name: Optional[str],
     imports: Dict[str, str],
 ) -> str:
-    try:
-        func_node = ast.parse(declaration).body[0]
+    with profile_phase("parse_docstring"):
+        result = parse_declaration(declaration)
+    if result is not None:
         # parse successful and found content, record all imports
-        return process_ast_node(declaration, func_node, imports)
-    except SyntaxError:
-        pass
+        imports.update(result[1])
+        return result[0]
 
     # failed to get function stub, try to check for builtin method signature
     if self_var is not None and name.startswith("__") and name.endswith("__"):
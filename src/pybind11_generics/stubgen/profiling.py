@@ -0,0 +1,124 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2021 Blue Cheetah Analog Design Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""This module records how much time stub generation spends in each phase.
+
+Profiling is disabled unless a StubProfile is activated with record_profile(), in which case
+the profile_phase() and profile_count() calls sprinkled through stubgen record into it.
+Phase times are exclusive: time spent in a nested phase is not counted in the outer phase.
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# the active profile, if any
+_active_profile: Optional["StubProfile"] = None
+# shared no-op context manager used when profiling is disabled
+_null_context: ContextManager[None] = nullcontext()
+
+
+class StubProfile:
+    """Phase times and member counts of generating the stub of one module.
+
+    Parameters
+    ----------
+    module_name : str
+        the module name.
+    """
+
+    def __init__(self, module_name: str) -> None:
+        self.module_name = module_name
+        self.times: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        # stack of (phase name, start time of the current exclusive interval)
+        self._stack: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        now = time.perf_counter()
+        if self._stack:
+            # pause the enclosing phase
+            outer_name, outer_start = self._stack[-1]
+            self.times[outer_name] = self.times.get(outer_name, 0.0) + (now - outer_start)
+        self._stack.append((name, now))
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            _, start = self._stack.pop()
+            self.times[name] = self.times.get(name, 0.0) + (now - start)
+            if self._stack:
+                # resume the enclosing phase
+                self._stack[-1] = (self._stack[-1][0], now)
+
+    def count(self, name: str, num: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + num
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            module=self.module_name,
+            seconds=sum(self.times.values()),
+            phases=dict(sorted(self.times.items())),
+            counts=dict(sorted(self.counts.items())),
+        )
+
+
+@contextmanager
+def record_profile(module_name: str) -> Iterator[StubProfile]:
+    """Activate a new profile for the duration of this context."""
+    global _active_profile
+
+    prev = _active_profile
+    _active_profile = StubProfile(module_name)
+    try:
+        yield _active_profile
+    finally:
+        _active_profile = prev
+
+
+def profile_phase(name: str) -> ContextManager[None]:
+    """Returns a context manager that records time spent in the given phase."""
+    if _active_profile is None:
+        return _null_context
+    return _active_profile.phase(name)
+
+
+def profile_count(name: str, num: int = 1) -> None:
+    if _active_profile is not None:
+        _active_profile.count(name, num)
+
+
+def summarize_profiles(profiles: Sequence[Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+    """Combine module profiles into a single report.
+
+    Extra keyword arguments are added to the report as is.
+    """
+    phases: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    for prof in profiles:
+        for key, val in prof["phases"].items():
+            phases[key] = phases.get(key, 0.0) + val
+        for key, val in prof["counts"].items():
+            counts[key] = counts.get(key, 0) + val
+
+    ans: Dict[str, Any] = dict(
+        seconds=sum(phases.values()),
+        phases=dict(sorted(phases.items())),
+        counts=dict(sorted(counts.items())),
+    )
+    ans.update(kwargs)
+    ans["modules"] = list(profiles)
+    return ans
@@ -18,18 +18,25 @@
 The public interface is via the mypy.stubgen module.
 """
 
+import hashlib
 import importlib
 import importlib.util
 import inspect
+import io
+import json
 import subprocess
 import sys
+from functools import lru_cache
 from pathlib import Path
 from types import ModuleType
-from typing import IO, Any, Dict, List, Mapping, Optional, Tuple, cast
+from typing import IO, Any, Dict, List, Mapping, Optional, Sequence, Tuple, cast
 
 import isort
 
+from .aliases import extract_type_aliases
+from .manifest import StubManifest, get_module_fingerprint
 from .parsedoc import get_prop_type, write_function_stubs
+from .profiling import profile_count, profile_phase
 
 # list of base class names to ignore
 skip_base_names = ("pybind11_object", "object")
@@ -44,31 +51,176 @@ skip_attrs = (
     "__new__",
     "__weakref__",
 )
+# file name suffix of signature index files
+index_suffix = ".pyi.json"
+# version of the signature index format
+index_version = 1
 
 
-def generate_stub_for_c_module(module_name: str, output_path: Path) -> Path:
+def generate_stub_for_c_module(
+    module_name: str,
+    output_path: Path,
+    manifest: Optional[StubManifest] = None,
+    external_format: bool = False,
+    type_aliases: bool = False,
+    write_index: bool = False,
+) -> Path:
+    """Generate the stub file of the given C module.
 
-    module = importlib.import_module(module_name)
-    if not is_c_module(module):
-        raise RuntimeError(f"{module_name} is not a C module")
+    The stub file is only written if its content changed, so an unchanged stub keeps its
+    modification time.
+
+    If manifest is given, the stub is only regenerated if the module fingerprint changed
+    since the last run, and the manifest is updated with the new fingerprint.
+
+    The stub is formatted with isort and black in-process.  If external_format is True, the
+    stub is written unformatted to a temporary file next to the target instead, and the caller
+    should run format_stub_files() on all generated stubs afterwards.
+
+    If type_aliases is True, repeated complex type expressions are replaced by type aliases.
+
+    If write_index is True, a JSON signature index of the module is also written next to the
+    stub file, see get_stub_content() for its format.
+    """
+    with profile_phase("import"):
+        module = import_c_module(module_name)
 
     hier_list = module_name.split(".")
     hier_list[-1] += ".pyi"
     target = output_path.joinpath(*hier_list)
-    target.parent.mkdir(parents=True, exist_ok=True)
+    index_target = get_index_path(target)
+
+    fingerprint = ""
+    if manifest is not None:
+        with profile_phase("fingerprint"):
+            fingerprint = get_module_fingerprint(
+                module,
+                f"external_format={external_format};type_aliases={type_aliases};"
+                f"write_index={write_index};format_config={get_format_config(target)}",
+            )
+        if manifest.is_up_to_date(module_name, fingerprint, target) and (
+            not write_index or index_target.is_file()
+        ):
+            return target
+
+    index: Optional[Dict[str, Any]] = {} if write_index else None
+    content = get_stub_content(module, type_aliases=type_aliases, index=index)
+    if not external_format:
+        content = format_stub(content, target)
+    with profile_phase("write"):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if external_format:
+            # NOTE: compare with the existing stub after formatting, so unchanged stubs keep
+            # their modification time.
+            with open(get_unformatted_path(target), "w") as f:
+                f.write(content)
+        else:
+            write_if_changed(target, content)
+        if index is not None:
+            write_if_changed(index_target, json.dumps(index, separators=(",", ":")) + "\n")
+
+    if manifest is not None:
+        manifest.update(module_name, fingerprint)
+    return target
+
+
+def generate_stub_text(
+    module_name: str, target: Optional[Path] = None, type_aliases: bool = False
+) -> str:
+    """Returns the formatted stub of the given C module, without writing any files.
+
+    Parameters
+    ----------
+    module_name : str
+        the module name.
+    target : Optional[Path]
+        the stub file location, used to find isort/black configuration files.  Defaults to
+        the current working directory.
+    type_aliases : bool
+        True to replace repeated complex type expressions by type aliases.
+
+    Returns
+    -------
+    content : str
+        the stub file content.
+    """
+    if target is None:
+        target = Path.cwd().joinpath(module_name + ".pyi")
+    content = get_stub_content(import_c_module(module_name), type_aliases=type_aliases)
+    return format_stub(content, target)
+
+
+def import_c_module(module_name: str) -> ModuleType:
+    module = importlib.import_module(module_name)
+    if not is_c_module(module):
+        raise RuntimeError(f"{module_name} is not a C module")
+    return module
+
+
+def get_index_path(target: Path) -> Path:
+    """Returns the signature index file path of the given stub file."""
+    return target.with_name(target.name[: -len(".pyi")] + index_suffix)
+
+
+def get_stub_content(
+    module: ModuleType, type_aliases: bool = False, index: Optional[Dict[str, Any]] = None
+) -> str:
+    """Returns the unformatted stub of the given C module.
+
+    If index is given, it is filled with a signature index of the module, which can be
+    serialized to JSON.  Class and type names in the index are the same as in the stub, and
+    the "imports" entry maps them to the module they are imported from:
+
+    {
+        "version": 1,
+        "module": "pkg.mod",
+        "imports": {"List": "typing", "Node": "pkg.core"},
+        "variables": {"VERSION": "int"},
+        "functions": {"foo": ["foo(a: int) -> int", "foo(a: str) -> int"]},
+        "classes": {
+            "Cls": {
+                "bases": ["pkg.core.Node"],
+                "variables": {},
+                "properties": {"size": {"type": "int", "readonly": true}},
+                "methods": {"create": {"static": true, "overloads": ["create() -> Cls"]}},
+            },
+        },
+    }
+
+    Every function and method has a list of signatures, one per overload.
+    """
+    module_name = module.__name__
 
     # parse all members of this module
     imports: Dict[str, str] = {}
     types: List[List[str]] = []
     variables: List[str] = []
     functions: List[str] = []
-    for name, obj in sorted(module.__dict__.items(), key=lambda x: x[0]):
-        if process_c_function(name, obj, functions, imports):
-            pass
-        elif process_c_type(name, obj, types, imports):
-            pass
-        else:
-            process_c_var(name, obj, variables, imports)
+    var_index: Optional[Dict[str, Any]] = None
+    fun_index: Optional[Dict[str, Any]] = None
+    cls_index: Optional[Dict[str, Any]] = None
+    if index is not None:
+        var_index = {}
+        fun_index = {}
+        cls_index = {}
+        index.update(
+            version=index_version,
+            module=module_name,
+            imports={},
+            variables=var_index,
+            functions=fun_index,
+            classes=cls_index,
+        )
+
+    with profile_phase("introspect"):
+        for name, obj in sorted(module.__dict__.items(), key=lambda x: x[0]):
+            profile_count("members")
+            if process_c_function(name, obj, functions, imports, index=fun_index):
+                pass
+            elif process_c_type(name, obj, types, imports, index=cls_index):
+                pass
+            else:
+                process_c_var(name, obj, variables, imports, index=var_index)
 
     ndarray_module = ""
     import_reformat: Dict[str, List[str]] = {}
@@ -83,9 +235,15 @@ def generate_stub_for_c_module(module_name: str, output_path: Path) -> Path:
                     import_reformat[m_name] = [c_name]
                 else:
                     cur_list.append(c_name)
-
-    # write output to file
-    with open(target, "w") as file:
+    if index is not None:
+        index["imports"] = {
+            c_name: m_name
+            for c_name, m_name in sorted(imports.items(), key=lambda x: x[0])
+            if m_name != module_name
+        }
+
+    # write stub content
+    with profile_phase("render"), io.StringIO() as file:
         write_header(file, module_name)
         file.write("from __future__ import annotations\n\n")
 
@@ -117,16 +275,142 @@ def generate_stub_for_c_module(module_name: str, output_path: Path) -> Path:
                 file.write(line)
                 file.write("\n")
             file.write("\n\n")
+        content = file.getvalue()
+
+    if type_aliases:
+        with profile_phase("type_aliases"):
+            content = extract_type_aliases(content)
+    return content
+
+
+def write_if_changed(target: Path, content: str) -> bool:
+    """Write content to target, unless target already has the same content.
+
+    Returns True if the file is written.
+    """
+    try:
+        with open(target, "r") as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+
+    with open(target, "w") as f:
+        f.write(content)
+    return True
+
 
-    # Run isort/black to format file
-    isort.file(target)
+def format_stub(content: str, target: Path) -> str:
+    """Format the content of a stub file with isort and black, without running subprocesses.
 
-    if importlib.util.find_spec("black") is None:
+    Configuration files are looked up from the target location, the same way the command line
+    tools would.
+    """
+    try:
+        import black
+    except ImportError:
         raise RuntimeError('Cannot find "black" Python module, is it installed?')
 
-    subprocess.check_call([sys.executable, "-m", "black", str(target)])
+    with profile_phase("format"):
+        # NOTE: the target directory may not exist yet, and isort rejects missing directories
+        config_dir = next(path for path in target.parents if path.is_dir())
+        content = isort.code(content, config=_get_isort_config(str(config_dir)), extension="pyi")
+        return black.format_str(content, mode=_get_black_mode(str(config_dir)))
+
+
+def get_format_config(target: Path) -> str:
+    """Returns a hash of the isort/black configuration files used to format the given stub."""
+    config_dir = next(path for path in target.parents if path.is_dir())
+    return _get_format_config(str(config_dir))
+
+
+def get_unformatted_path(target: Path) -> Path:
+    """Returns the temporary file of the unformatted stub, used with external formatting.
+
+    The file keeps the .pyi suffix and stays in the same directory, so isort and black format
+    it as a stub with the same configuration as the target.
+    """
+    return target.with_name(f".{target.stem}.unformatted.pyi")
+
+
+def format_stub_files(targets: Sequence[Path]) -> None:
+    """Format the given stub files with the isort/black command line tools.
+
+    The unformatted stubs are read from their temporary files, and each target is only written
+    if the formatted content changed.  black is run once for all files, so we only pay the
+    interpreter startup cost once.
+    """
+    if not targets:
+        return
+
+    tmp_files = [get_unformatted_path(target) for target in targets]
+    try:
+        for tmp_file in tmp_files:
+            isort.file(tmp_file)
+
+        if importlib.util.find_spec("black") is None:
+            raise RuntimeError('Cannot find "black" Python module, is it installed?')
+
+        subprocess.check_call(
+            [sys.executable, "-m", "black", *(str(tmp_file) for tmp_file in tmp_files)]
+        )
+
+        for target, tmp_file in zip(targets, tmp_files):
+            with open(tmp_file, "r") as f:
+                write_if_changed(target, f.read())
+    finally:
+        for tmp_file in tmp_files:
+            tmp_file.unlink(missing_ok=True)
 
-    return target
+
+@lru_cache(maxsize=None)
+def _get_isort_config(dir_name: str) -> isort.Config:
+    return isort.Config(settings_path=dir_name)
+
+
+@lru_cache(maxsize=None)
+def _get_format_config(dir_name: str) -> str:
+    config_files = {
+        str(source["source"])
+        for source in _get_isort_config(dir_name).sources
+        if "source" in source
+    }
+    try:
+        import black
+    except ImportError:
+        pass
+    else:
+        pyproject = black.find_pyproject_toml((dir_name,))
+        if pyproject:
+            config_files.add(pyproject)
+
+    hasher = hashlib.sha256()
+    for fname in sorted(config_files):
+        path = Path(fname)
+        if path.is_file():
+            hasher.update(f"\0{fname}\0".encode("utf-8"))
+            hasher.update(path.read_bytes())
+    return hasher.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _get_black_mode(dir_name: str) -> Any:
+    import black
+
+    config: Dict[str, Any] = {}
+    pyproject = black.find_pyproject_toml((dir_name,))
+    if pyproject:
+        config = black.parse_pyproject_toml(pyproject)
+
+    return black.Mode(
+        target_versions={
+            black.TargetVersion[val.upper()] for val in config.get("target_version", [])
+        },
+        line_length=config.get("line_length", black.DEFAULT_LINE_LENGTH),
+        is_pyi=True,
+        string_normalization=not config.get("skip_string_normalization", False),
+        magic_trailing_comma=not config.get("skip_magic_trailing_comma", False),
+    )
 
 
 def process_c_var(
@@ -135,6 +419,7 @@ def process_c_var(
     output: List[str],
     imports: Dict[str, str],
     check: bool = True,
+    index: Optional[Dict[str, Any]] = None,
 ) -> bool:
     if name == "__hash__" and obj is None:
         # pybind11 will set __hash__ to None
@@ -142,9 +427,12 @@ def process_c_var(
     if check and ((name.startswith("__") and name.endswith("__")) or inspect.ismodule(obj)):
         return False
 
+    profile_count("variables")
     type_obj = type(obj)
     imports[type_obj.__name__] = type_obj.__module__
     output.append(f"{name}: {type_obj.__name__} = ...")
+    if index is not None:
+        index[name] = type_obj.__name__
     return True
 
 
@@ -156,11 +444,19 @@ def process_c_function(
     self_var: Optional[str] = None,
     cls_name: Optional[str] = None,
     check: bool = True,
+    index: Optional[Dict[str, Any]] = None,
 ) -> bool:
     if check and not is_c_function(obj):
         return False
 
-    write_function_stubs(name, getattr(obj, "__doc__", ""), self_var, cls_name, output, imports)
+    if cls_name is None:
+        # methods are counted by process_c_method()
+        profile_count("functions")
+    with profile_phase("introspect_function"):
+        start = len(output)
+        write_function_stubs(name, getattr(obj, "__doc__", ""), self_var, cls_name, output, imports)
+        if index is not None:
+            index[name] = get_signatures(output[start:])
     return True
 
 
@@ -169,48 +465,69 @@ def process_c_type(
     obj: type,
     output: List[List[str]],
     imports: Dict[str, str],
+    index: Optional[Dict[str, Any]] = None,
 ) -> bool:
     if (cls_name.startswith("__") and cls_name.endswith("__")) or not is_c_type(obj):
         return False
 
-    obj_dict: Mapping[str, Any] = obj.__dict__
-
-    # parse all members of this class
-    methods = []  # type: List[str]
-    variables = []  # type: List[str]
-    properties = []  # type: List[str]
-    for mem_name, mem_obj in sorted(obj_dict.items(), key=lambda x: method_name_sort_key(x[0])):
-        if mem_name in skip_attrs:
-            pass
-        elif process_c_method(mem_name, mem_obj, methods, imports, cls_name):
-            pass
-        elif process_c_property(mem_name, mem_obj, properties, imports):
-            pass
+    profile_count("classes")
+    with profile_phase("introspect_type"):
+        obj_dict: Mapping[str, Any] = obj.__dict__
+
+        # parse all members of this class
+        methods = []  # type: List[str]
+        variables = []  # type: List[str]
+        properties = []  # type: List[str]
+        var_index: Optional[Dict[str, Any]] = None
+        prop_index: Optional[Dict[str, Any]] = None
+        method_index: Optional[Dict[str, Any]] = None
+        if index is not None:
+            var_index = {}
+            prop_index = {}
+            method_index = {}
+        for mem_name, mem_obj in sorted(obj_dict.items(), key=lambda x: method_name_sort_key(x[0])):
+            profile_count("members")
+            if mem_name in skip_attrs:
+                pass
+            elif process_c_method(
+                mem_name, mem_obj, methods, imports, cls_name, index=method_index
+            ):
+                pass
+            elif process_c_property(mem_name, mem_obj, properties, imports, index=prop_index):
+                pass
+            else:
+                process_c_var(mem_name, mem_obj, variables, imports, check=False, index=var_index)
+
+        # determine the base class
+        all_bases = obj.mro()
+        # remove the class itself
+        all_bases = all_bases[1:]
+        # Remove base classes of other bases as redundant.
+        bases = []  # type: List[type]
+        for base in all_bases:
+            if base.__name__ not in skip_base_names and not any(issubclass(b, base) for b in bases):
+                bases.append(base)
+        if bases:
+            bases_str = f'({", ".join(base.__name__ for base in bases)})'
         else:
-            process_c_var(mem_name, mem_obj, variables, imports, check=False)
-
-    # determine the base class
-    all_bases = obj.mro()
-    # remove the class itself
-    all_bases = all_bases[1:]
-    # Remove base classes of other bases as redundant.
-    bases = []  # type: List[type]
-    for base in all_bases:
-        if base.__name__ not in skip_base_names and not any(issubclass(b, base) for b in bases):
-            bases.append(base)
-    if bases:
-        bases_str = f'({", ".join(base.__name__ for base in bases)})'
-    else:
-        bases_str = ""
+            bases_str = ""
 
-    if not methods and not variables and not properties:
-        output.append([f"class {cls_name}{bases_str}: ..."])
-    else:
-        cls_lines = [f"class {cls_name}{bases_str}:"]
-        cls_lines.extend((f"    {line}" for line in variables))
-        cls_lines.extend((f"    {line}" for line in properties))
-        cls_lines.extend((f"    {line}" for line in methods))
-        output.append(cls_lines)
+        if not methods and not variables and not properties:
+            output.append([f"class {cls_name}{bases_str}: ..."])
+        else:
+            cls_lines = [f"class {cls_name}{bases_str}:"]
+            cls_lines.extend((f"    {line}" for line in variables))
+            cls_lines.extend((f"    {line}" for line in properties))
+            cls_lines.extend((f"    {line}" for line in methods))
+            output.append(cls_lines)
+
+        if index is not None:
+            index[cls_name] = dict(
+                bases=[f"{base.__module__}.{base.__qualname__}" for base in bases],
+                variables=var_index,
+                properties=prop_index,
+                methods=method_index,
+            )
 
     return True
 
@@ -221,11 +538,13 @@ def process_c_method(
     output: List[str],
     imports: Dict[str, str],
     cls_name: str,
+    index: Optional[Dict[str, Any]] = None,
 ) -> bool:
     is_static = is_c_staticmethod(obj)
     if not is_static and not is_c_method(obj):
         return False
 
+    profile_count("methods")
     if is_static:
         output.append("@staticmethod")
         obj = cast(staticmethod, obj).__func__
@@ -233,9 +552,13 @@ def process_c_method(
     else:
         self_var = "self"
 
-    return process_c_function(
+    start = len(output)
+    process_c_function(
         name, obj, output, imports, self_var=self_var, cls_name=cls_name, check=False
     )
+    if index is not None:
+        index[name] = dict(static=is_static, overloads=get_signatures(output[start:]))
+    return True
 
 
 def process_c_property(
@@ -243,23 +566,33 @@ def process_c_property(
     obj: object,
     output: List[str],
     imports: Dict[str, str],
+    index: Optional[Dict[str, Any]] = None,
 ) -> bool:
     if not is_c_property(obj):
         return False
 
-    readonly = is_c_property_readonly(obj)
+    profile_count("properties")
+    with profile_phase("introspect_property"):
+        readonly = is_c_property_readonly(obj)
 
-    prop_type = get_prop_type(getattr(obj, "__doc__", ""), imports)
+        prop_type = get_prop_type(getattr(obj, "__doc__", ""), imports)
 
-    output.append("@property")
-    output.append(f"def {name}(self) -> {prop_type}: ...")
-    if not readonly:
-        output.append(f"@{name}.setter")
-        output.append(f"def {name}(self, val: {prop_type}) -> None: ...")
+        output.append("@property")
+        output.append(f"def {name}(self) -> {prop_type}: ...")
+        if not readonly:
+            output.append(f"@{name}.setter")
+            output.append(f"def {name}(self, val: {prop_type}) -> None: ...")
+        if index is not None:
+            index[name] = dict(type=prop_type, readonly=readonly)
 
     return True
 
 
+def get_signatures(lines: Sequence[str]) -> List[str]:
+    """Returns the signatures of all function definitions in the given stub lines."""
+    return [line[4:-5] for line in lines if line.startswith("def ") and line.endswith(": ...")]
+
+
 def is_c_function(obj: object) -> bool:
     return type(obj) is type(ord)
 